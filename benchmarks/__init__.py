@@ -0,0 +1,5 @@
+#
+# Benchmarks for the hot paths of launchpad_py; run with:
+#
+#   python -m benchmarks [--calls N] [--json results.json]
+#
@@ -0,0 +1,5 @@
+import sys
+
+from benchmarks.bench import Main
+
+sys.exit(Main())
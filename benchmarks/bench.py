@@ -0,0 +1,188 @@
+#
+# Benchmarks for the LED output and button input hot paths.
+#
+# Runs against a virtual Launchpad (no hardware required) whose output port
+# records every message, so each path can be measured in calls per second,
+# MIDI messages and bytes per logical update and per call latency (p50/p99).
+#
+
+import argparse
+import json
+import platform
+import sys
+import time
+
+from launchpad_py.launchpad import Launchpad, Midi, ButtonEvents
+from launchpad_py.virtual import VirtualBackend, VirtualLaunchpad, VirtualOutput
+
+
+########################################################################################
+# CLASS RecordingOutput
+###
+# A virtual output port that counts messages and bytes
+########################################################################################
+class RecordingOutput(VirtualOutput):
+
+    def __init__(self, device):
+        VirtualOutput.__init__(self, device)
+        self.messages = 0
+        self.bytes = 0
+        self.writes = 0
+
+    def write_short(self, stat, dat1=0, dat2=0):
+        self.messages += 1
+        self.bytes += 3
+        self.writes += 1
+        VirtualOutput.write_short(self, stat, dat1, dat2)
+
+    def write(self, lstMessages):
+        self.messages += len(lstMessages)
+        self.bytes += sum(len(msg) for msg, timestamp in lstMessages)
+        self.writes += 1
+        VirtualOutput.write(self, lstMessages)
+
+    def write_sys_ex(self, timestamp, msg):
+        self.messages += 1
+        self.bytes += len(msg)
+        self.writes += 1
+        VirtualOutput.write_sys_ex(self, timestamp, msg)
+
+
+########################################################################################
+# CLASS RecordingBackend
+###
+########################################################################################
+class RecordingBackend(VirtualBackend):
+
+    def OpenOutput(self, midi_id, latency=0, bufferSize=None):
+        VirtualBackend.OpenOutput(self, midi_id, latency, bufferSize)
+        return RecordingOutput(self.devices[midi_id // 2])
+
+
+# -------------------------------------------------------------------------------------
+# -- Returns the <p> percentile of the sorted list <values>
+# -------------------------------------------------------------------------------------
+def Percentile(values, p):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p / 100.0))]
+
+
+# -------------------------------------------------------------------------------------
+# -- Calls <func>( i ) <calls> times and returns the measurements as a dictionary
+# -------------------------------------------------------------------------------------
+def Measure(lp, func, calls):
+    out = lp.midi.devOut
+    messages, nbytes, writes = out.messages, out.bytes, out.writes
+    times = []
+    clock = time.perf_counter
+
+    start = clock()
+    for i in range(calls):
+        t = clock()
+        func(i)
+        times.append(clock() - t)
+    total = clock() - start
+
+    times.sort()
+    return {
+        "calls": calls,
+        "calls_per_sec": calls / total if total > 0 else 0.0,
+        "messages_per_call": (out.messages - messages) / float(calls),
+        "bytes_per_call": (out.bytes - nbytes) / float(calls),
+        "writes_per_call": (out.writes - writes) / float(calls),
+        "p50_us": Percentile(times, 50) * 1e6,
+        "p99_us": Percentile(times, 99) * 1e6,
+    }
+
+
+# -------------------------------------------------------------------------------------
+# -- Runs all benchmarks; returns { <name>: <measurements> }
+# -------------------------------------------------------------------------------------
+def RunAll(calls=2000):
+    vlp = VirtualLaunchpad()
+    Midi.SetBackend(RecordingBackend([vlp], realtime=True))
+    lp = Launchpad()
+    if not lp.Open():
+        raise RuntimeError("unable to open the virtual Launchpad")
+    lp.Reset()
+
+    results = {}
+
+    def ledXY(i):
+        lp.LedCtrlXY(i % 9, (i // 9) % 9, i & 3, (i >> 2) & 3)
+    results["LedCtrlXY"] = Measure(lp, ledXY, calls)
+
+    leds = [lp.LedGetColor(i & 3, (i >> 2) & 3) for i in range(80)]
+
+    def rapid(i):
+        lp.LedCtrlRawRapidHome()
+        lp.LedCtrlRawRapid(leds)
+    results["LedCtrlRawRapid"] = Measure(lp, rapid, calls // 10 or 1)
+
+    def char(i):
+        lp.LedCtrlChar(chr(65 + i % 26), 3, 0)
+    results["LedCtrlChar"] = Measure(lp, char, calls // 10 or 1)
+
+    def string(i):
+        lp.LedCtrlString("Hi", 3, 0, direction=lp.SCROLL_LEFT, waitms=0)
+    results["LedCtrlString"] = Measure(lp, string, max(1, calls // 200))
+
+    def flush(i):
+        lp.frame.Clear(0)
+        lp.frame.SetXY(i % 8, 1 + (i // 8) % 8, 0x33)
+        lp.Flush()
+    results["Flush(sparse)"] = Measure(lp, flush, calls)
+
+    def flushFull(i):
+        lp.frame.Clear(leds[i % 80])
+        lp.Flush()
+    results["Flush(full)"] = Measure(lp, flushFull, calls // 10 or 1)
+
+    # input: fill the virtual device's queue, then decode it event by event
+    for name, func in (("ButtonStateRaw", lp.ButtonStateRaw), ("ButtonStateXY", lp.ButtonStateXY)):
+        for i in range(calls):
+            vlp.Press(i % 8, 1 + (i // 8) % 8, i % 2 == 0, at=0)
+        results[name] = Measure(lp, lambda i: func(), calls)
+
+    events = ButtonEvents(256)
+    for i in range(256 * (calls // 100 or 1)):
+        vlp.Press(i % 8, 1 + (i // 8) % 8, i % 2 == 0, at=0)
+    results["ButtonStateBatch"] = Measure(lp, lambda i: lp.ButtonStateBatch(events), calls // 100 or 1)
+
+    lp.Close()
+    return results
+
+
+# -------------------------------------------------------------------------------------
+# -- Command line
+# -------------------------------------------------------------------------------------
+def Main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="launchpad_py hot path benchmarks")
+    parser.add_argument("--calls", type=int, default=2000, help="calls per benchmark")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args(argv)
+
+    results = RunAll(args.calls)
+
+    print("%-18s %12s %10s %10s %10s %10s" % (
+        "benchmark", "calls/s", "msgs/call", "bytes/call", "p50 us", "p99 us"))
+    for name, r in results.items():
+        print("%-18s %12.0f %10.1f %10.1f %10.1f %10.1f" % (
+            name, r["calls_per_sec"], r["messages_per_call"], r["bytes_per_call"],
+            r["p50_us"], r["p99_us"]))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "results": results,
+            }, f, indent=2, sort_keys=True)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(Main())
@@ -1,3 +1,10 @@
 # more specific selections for Python 3 (ASkr, 2/2018)
 from launchpad_py.launchpad import Launchpad
-from launchpad_py import charset
+
+
+# The charset is only loaded when it is used (PEP 562).
+def __getattr__(name):
+    if name == "charset":
+        import importlib
+        return importlib.import_module("launchpad_py.charset")
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
@@ -0,0 +1,102 @@
+#
+# asyncio interface for the Launchpad classes.
+#
+# All blocking PortMidi calls are executed in a single worker thread,
+# input comes from the Launchpad's background reader (see ReaderStart()).
+#
+#   alp = AsyncLaunchpad()
+#   await alp.open()
+#   async for ev in alp.events():
+#       alp.lp.FrameCtrlXY( ev[0], ev[1], 3, 0 )
+#       await alp.flush()
+#
+
+import asyncio
+import concurrent.futures
+
+try:
+    from launchpad_py.launchpad import Launchpad, LedFrame
+except ImportError:
+    from launchpad import Launchpad, LedFrame
+
+
+########################################################################################
+# CLASS AsyncLaunchpad
+###
+# Wraps a Launchpad (or any other LaunchpadBase device) for use with asyncio.
+########################################################################################
+class AsyncLaunchpad(object):
+
+    def __init__(self, lp=None):
+        self.lp = Launchpad() if lp is None else lp
+        # one thread only; keeps the order of all MIDI output
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="LaunchpadOutput")
+        self.loop = None
+        self.wake = None
+        self.flushLock = None
+        self.flushFrame = LedFrame()
+
+    # -------------------------------------------------------------------------------------
+    # -- Opens the device and starts its background reader.
+    # -- Returns True on success, False otherwise.
+    # -------------------------------------------------------------------------------------
+    async def open(self, number=0, name="Launchpad", maxEvents=1024):
+        self.loop = asyncio.get_running_loop()
+        self.wake = asyncio.Event()
+        self.flushLock = asyncio.Lock()
+
+        if not await self.call(self.lp.Open, number, name):
+            return False
+
+        return self.lp.ReaderStart(maxEvents, callback=self.OnEvent)
+
+    # -------------------------------------------------------------------------------------
+    # -- Stops the reader, waits for all pending output and closes the device.
+    # -------------------------------------------------------------------------------------
+    async def close(self):
+        await self.call(self.lp.Close)
+        self.executor.shutdown(wait=True)
+
+    # -------------------------------------------------------------------------------------
+    # -- Called from the reader thread for each new event
+    # -------------------------------------------------------------------------------------
+    def OnEvent(self, ev):
+        self.loop.call_soon_threadsafe(self.wake.set)
+
+    # -------------------------------------------------------------------------------------
+    # -- Async generator of all button events, as decoded by the device's EventDecode()
+    # -------------------------------------------------------------------------------------
+    async def events(self):
+        lp = self.lp
+        while True:
+            ev = lp.ReaderPop()
+            if ev is None:
+                self.wake.clear()
+                # the reader might have been faster than us
+                ev = lp.ReaderPop()
+                if ev is None:
+                    await self.wake.wait()
+                    continue
+            yield ev
+
+    # -------------------------------------------------------------------------------------
+    # -- Sends the changed cells of the frame buffer (see Launchpad.Flush()) from the
+    # -- output thread. A snapshot of the frame is taken, so drawing can go on while
+    # -- it's being sent.
+    # -- Only one flush is in flight at any time; further calls wait for it, which
+    # -- slows down producers that are faster than the device (back-pressure).
+    # -- Returns the number of MIDI messages sent.
+    # -------------------------------------------------------------------------------------
+    async def flush(self):
+        async with self.flushLock:
+            self.flushFrame.CopyFrom(self.lp.frame)
+            return await self.call(self.lp.Flush, self.flushFrame)
+
+    # -------------------------------------------------------------------------------------
+    # -- Runs any blocking device method <func> in the output thread, e.g.:
+    # --   await alp.call( alp.lp.LedCtrlChar, 'A', 3, 0 )
+    # -------------------------------------------------------------------------------------
+    async def call(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
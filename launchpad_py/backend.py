@@ -0,0 +1,112 @@
+#
+# MIDI backends for class Midi.
+#
+# A backend enumerates the MIDI devices and opens their ports. Port objects
+# follow PyGame's midi.Output and midi.Input interface:
+#
+#   output: write_short( stat, dat1, dat2 ), write( [ [ [stat, ...], timestamp ], ... ] ),
+#           write_sys_ex( timestamp, msg ), close()
+#   input:  poll(), read( count ) -> [ [ [stat, dat1, dat2, dat3], timestamp ], ... ], close()
+#
+# Select one with Midi.SetBackend() before opening any device; PyGame is the default.
+#
+
+
+########################################################################################
+# CLASS MidiBackend
+###
+# The interface; all methods need to be implemented.
+########################################################################################
+class MidiBackend(object):
+
+    # -------------------------------------------------------------------------------------
+    # -- (Re-)initializes the backend; the device list is read here
+    # -------------------------------------------------------------------------------------
+    def Init(self):
+        raise NotImplementedError
+
+    # -------------------------------------------------------------------------------------
+    # -- Shuts down the backend; invalidates all open ports
+    # -------------------------------------------------------------------------------------
+    def Quit(self):
+        raise NotImplementedError
+
+    # -------------------------------------------------------------------------------------
+    # -- Returns the number of MIDI ports
+    # -------------------------------------------------------------------------------------
+    def GetCount(self):
+        raise NotImplementedError
+
+    # -------------------------------------------------------------------------------------
+    # -- Returns ( <interface>, <name>, <input>, <output>, <opened> ) of port <midi_id>
+    # -------------------------------------------------------------------------------------
+    def GetDeviceInfo(self, midi_id):
+        raise NotImplementedError
+
+    # -------------------------------------------------------------------------------------
+    # -- Returns the MIDI time in ms; used for the timestamps of input events
+    # -------------------------------------------------------------------------------------
+    def GetTime(self):
+        raise NotImplementedError
+
+    # -------------------------------------------------------------------------------------
+    # -- Waits <ms> milliseconds
+    # -------------------------------------------------------------------------------------
+    def Wait(self, ms):
+        raise NotImplementedError
+
+    # -------------------------------------------------------------------------------------
+    # -- Opens output port <midi_id>; returns the port object or raises an exception
+    # -------------------------------------------------------------------------------------
+    def OpenOutput(self, midi_id, latency=0, bufferSize=None):
+        raise NotImplementedError
+
+    # -------------------------------------------------------------------------------------
+    # -- Opens input port <midi_id>; returns the port object or raises an exception
+    # -------------------------------------------------------------------------------------
+    def OpenInput(self, midi_id, bufferSize=None):
+        raise NotImplementedError
+
+
+########################################################################################
+# CLASS PygameBackend
+###
+# PortMidi, via pygame.midi
+########################################################################################
+class PygameBackend(MidiBackend):
+
+    def __init__(self):
+        from pygame import midi
+        from pygame import time
+        self.midi = midi
+        self.time = time
+
+    def Init(self):
+        self.midi.init()
+
+    def Quit(self):
+        self.midi.quit()
+
+    def GetCount(self):
+        return self.midi.get_count()
+
+    def GetDeviceInfo(self, midi_id):
+        return self.midi.get_device_info(midi_id)
+
+    def GetTime(self):
+        return self.midi.time()
+
+    def Wait(self, ms):
+        self.time.wait(ms)
+
+    def OpenOutput(self, midi_id, latency=0, bufferSize=None):
+        # PyGame's default size of the buffer is 256.
+        if bufferSize is None:
+            return self.midi.Output(midi_id, latency)
+        return self.midi.Output(midi_id, latency, bufferSize)
+
+    def OpenInput(self, midi_id, bufferSize=None):
+        # PyGame's default size of the buffer is 4096.
+        if bufferSize is None:
+            return self.midi.Input(midi_id)
+        return self.midi.Input(midi_id, bufferSize)
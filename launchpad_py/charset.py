@@ -1,9 +1,10 @@
 
 #
 # a simple 8x8 font for the Launchpad
+# 8 bytes per character, top row first; bit 7 is the leftmost pixel
 #
 
-CHARTAB = [ 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,  # Char 000 (.)
+CHARTAB = bytes(( 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,  # Char 000 (.)
             0x7E, 0x81, 0xA5, 0x81, 0xBD, 0x99, 0x81, 0x7E,  # Char 001 (.)
             0x7E, 0xFF, 0xDB, 0xFF, 0xC3, 0xE7, 0xFF, 0x7E,  # Char 002 (.)
             0x6C, 0xFE, 0xFE, 0xFE, 0x7C, 0x38, 0x10, 0x00,  # Char 003 (.)
@@ -258,5 +259,5 @@ CHARTAB = [ 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,  # Char 000 (.)
             0x3C, 0x42, 0x99, 0xA1, 0xA1, 0x99, 0x42, 0x3C,  # Char 252 (.)
             0x30, 0x48, 0x10, 0x20, 0x78, 0x00, 0x00, 0x00,  # Char 253 (.)
             0x00, 0x00, 0x7C, 0x7C, 0x7C, 0x7C, 0x00, 0x00,  # Char 254 (.)
-            0x00, 0x00, 0x00, 0x00, 0x00, 0x42, 0x7E, 0x00 ]
+            0x00, 0x00, 0x00, 0x00, 0x00, 0x42, 0x7E, 0x00 ))
   
\ No newline at end of file
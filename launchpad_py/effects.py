@@ -0,0 +1,307 @@
+#
+# Animation and effects engine for the Mk1 Launchpad frame buffer.
+#
+# Effects are layers, drawn bottom to top into a scratch frame, once per frame.
+# A fixed rate scheduler on the monotonic clock renders the frames in a
+# background thread, copies them into the Launchpad's frame buffer and flushes
+# it, so only LEDs that changed are sent. Frames that are too late are skipped,
+# not queued, and the achieved frame rate and timing jitter are measured.
+#
+#   fx = EffectsEngine( lp, fps = 30 )
+#   fx.Add( Fade( ( 0, 0 ), ( 3, 3 ), 2.0 ) )
+#   fx.Add( Sprite( [ ( 0, 0, 3, 0 ), ( 1, 0, 3, 0 ) ], x = 0, y = 4, dx = 4, wrap = ( 9, 9 ) ) )
+#   fx.Add( Sparkle( 0, 3, density = 0.05 ) )
+#   fx.Start()
+#   ...
+#   fx.Stats()    -> { "fps": 29.9, "jitter_ms": 0.4, ... }
+#
+
+import collections
+import random
+import threading
+
+from time import monotonic
+
+try:
+    from launchpad_py.launchpad import LedFrame, FixedRateThread
+except ImportError:
+    from launchpad import LedFrame, FixedRateThread
+
+
+# LedFrame cells that have an LED; all but 8/0
+CELLS = tuple(i for i in range(81) if i != 8)
+
+
+# -------------------------------------------------------------------------------------
+# -- Returns the color code of <red> and <green>, 0..3 each; like LedGetColor(),
+# -- values are truncated to integers and limited to 0..3.
+# -------------------------------------------------------------------------------------
+def ColorCode(red, green):
+    return min(3, max(0, int(red))) | (min(3, max(0, int(green))) << 4)
+
+
+########################################################################################
+# CLASS Layer
+###
+# Base class of all effects. <duration> in seconds, None for endless layers;
+# finished layers are removed by the engine.
+########################################################################################
+class Layer(object):
+
+    def __init__(self, duration=None):
+        self.duration = duration
+        self.start = None
+
+    # -------------------------------------------------------------------------------------
+    # -- Draws the layer into <cells> (81 color codes, LedFrame order) at <t> seconds
+    # -- after the layer was added.
+    # -------------------------------------------------------------------------------------
+    def Render(self, cells, t):
+        raise NotImplementedError
+
+    # -------------------------------------------------------------------------------------
+    # -- True if the layer has finished at <t>
+    # -------------------------------------------------------------------------------------
+    def Done(self, t):
+        return self.duration is not None and t >= self.duration
+
+
+########################################################################################
+# CLASS Sprite
+###
+# A group of pixels [ ( <x>, <y>, <red>, <green> ), ... ], placed at <x>/<y> and
+# moving by <dx>/<dy> cells per second. With <wrap> ( <width>, <height> ), the
+# position wraps around; otherwise pixels outside of the 9x9 grid are clipped.
+########################################################################################
+class Sprite(Layer):
+
+    def __init__(self, pixels, x=0, y=0, dx=0, dy=0, wrap=None, duration=None):
+        Layer.__init__(self, duration)
+        self.pixels = [(px, py, ColorCode(red, green)) for px, py, red, green in pixels]
+        self.x = x
+        self.y = y
+        self.dx = dx
+        self.dy = dy
+        self.wrap = wrap
+
+    def Render(self, cells, t):
+        x = int(self.x + self.dx * t)
+        y = int(self.y + self.dy * t)
+        if self.wrap is not None:
+            x %= self.wrap[0]
+            y %= self.wrap[1]
+        for px, py, code in self.pixels:
+            px += x
+            py += y
+            if 0 <= px < 9 and 0 <= py < 9:
+                cells[py * 9 + px] = code
+
+
+########################################################################################
+# CLASS Fade
+###
+# Fades <cells> (list of x/y, None for all) from color <start> to <end>, both as
+# ( <red>, <green> ), in <duration> seconds. Red and green are stepped separately
+# through the 4 levels the LEDs support. The end color stays for <hold> seconds
+# (None: forever).
+########################################################################################
+class Fade(Layer):
+
+    def __init__(self, start, end, duration, cells=None, hold=0):
+        Layer.__init__(self, None if hold is None else duration + hold)
+        self.fadeTime = duration
+        self.red = (start[0], end[0])
+        self.green = (start[1], end[1])
+        self.cells = CELLS if cells is None else tuple(y * 9 + x for x, y in cells)
+
+    def Render(self, cells, t):
+        f = min(1.0, t / self.fadeTime) if self.fadeTime > 0 else 1.0
+        red = int(round(self.red[0] + (self.red[1] - self.red[0]) * f))
+        green = int(round(self.green[0] + (self.green[1] - self.green[0]) * f))
+        code = ColorCode(red, green)
+        for i in self.cells:
+            cells[i] = code
+
+
+########################################################################################
+# CLASS Wipe
+###
+# Fills the grid with <red>/<green>, line by line, in <duration> seconds.
+# <direction> is the direction of the movement: "right", "left", "down" or "up".
+# Stays for <hold> seconds after that (None: forever).
+########################################################################################
+class Wipe(Layer):
+
+    def __init__(self, red, green, duration, direction="right", hold=0):
+        Layer.__init__(self, None if hold is None else duration + hold)
+        if direction not in ("right", "left", "down", "up"):
+            raise ValueError("unknown wipe direction: %r" % (direction,))
+        self.code = ColorCode(red, green)
+        self.wipeTime = duration
+        self.direction = direction
+
+    def Render(self, cells, t):
+        f = min(1.0, t / self.wipeTime) if self.wipeTime > 0 else 1.0
+        lines = int(f * 9 + 0.5)
+        code = self.code
+        for i in CELLS:
+            if self.direction == "right":
+                inside = i % 9 < lines
+            elif self.direction == "left":
+                inside = i % 9 >= 9 - lines
+            elif self.direction == "down":
+                inside = i // 9 < lines
+            else:
+                inside = i // 9 >= 9 - lines
+            if inside:
+                cells[i] = code
+
+
+########################################################################################
+# CLASS Sparkle
+###
+# Random twinkling cells in <red>/<green>. Per second, <density> * 80 sparks are
+# started, each fading out over <decay> seconds. <seed> makes it repeatable.
+########################################################################################
+class Sparkle(Layer):
+
+    def __init__(self, red, green, density=0.05, decay=0.5, seed=None, duration=None):
+        Layer.__init__(self, duration)
+        self.red = red
+        self.green = green
+        self.rate = density * len(CELLS)
+        self.decay = decay
+        self.random = random.Random(seed)
+        self.sparks = {}
+        self.last = 0.0
+
+    def Render(self, cells, t):
+        rnd = self.random
+        sparks = self.sparks
+
+        # new sparks since the last frame; fractions are carried over by chance
+        n = self.rate * (t - self.last)
+        self.last = t
+        count = int(n) + (1 if rnd.random() < n - int(n) else 0)
+        for i in range(count):
+            sparks[rnd.choice(CELLS)] = t
+
+        for i, born in list(sparks.items()):
+            f = 1.0 - (t - born) / self.decay
+            if f <= 0:
+                del sparks[i]
+                continue
+            cells[i] = ColorCode(int(self.red * f + 0.5), int(self.green * f + 0.5))
+
+
+########################################################################################
+# CLASS EffectsEngine
+###
+# Renders the layers at a fixed rate of <fps> frames per second into the frame
+# buffer of Launchpad <lp> and flushes it. The frame is cleared to <background>
+# (a color code) before the layers are drawn.
+########################################################################################
+class EffectsEngine(FixedRateThread):
+
+    def __init__(self, lp, fps=30, background=0):
+        FixedRateThread.__init__(self, fps, "LaunchpadEffects")
+        self.lp = lp
+        self.background = background
+        self.layers = []
+        self.lock = threading.Lock()
+        self.scratch = LedFrame()
+
+        # statistics; see Stats(); <dropped> is counted by FixedRateThread
+        self.frames = 0
+        self.sent = 0
+        self.frameTimes = collections.deque(maxlen=max(2, int(2 * fps)))
+        self.jitter = collections.deque(maxlen=max(2, int(2 * fps)))
+
+    # -------------------------------------------------------------------------------------
+    # -- Adds a layer on top of all others; returns it
+    # -------------------------------------------------------------------------------------
+    def Add(self, layer):
+        with self.lock:
+            layer.start = None
+            self.layers.append(layer)
+        return layer
+
+    # -------------------------------------------------------------------------------------
+    # -- Removes a layer
+    # -------------------------------------------------------------------------------------
+    def Remove(self, layer):
+        with self.lock:
+            if layer in self.layers:
+                self.layers.remove(layer)
+
+    # -------------------------------------------------------------------------------------
+    # -- Removes all layers
+    # -------------------------------------------------------------------------------------
+    def Clear(self):
+        with self.lock:
+            self.layers = []
+
+    # -------------------------------------------------------------------------------------
+    # -- Changes the frame rate
+    # -------------------------------------------------------------------------------------
+    def SetFps(self, fps):
+        self.SetRate(fps)
+
+    # -------------------------------------------------------------------------------------
+    # -- Renders and flushes one frame for time <now> (monotonic seconds; None: now).
+    # -- Returns the number of MIDI messages sent. Called by the engine's thread, but
+    # -- can also be used to drive the engine from an own loop.
+    # -------------------------------------------------------------------------------------
+    def Tick(self, now=None):
+        if now is None:
+            now = monotonic()
+
+        cells = self.scratch.cells
+        cells[:] = [self.background] * 81
+        with self.lock:
+            layers = self.layers
+            for layer in layers:
+                if layer.start is None:
+                    layer.start = now
+                layer.Render(cells, now - layer.start)
+            self.layers = [layer for layer in layers if not layer.Done(now - layer.start)]
+
+        lp = self.lp
+        with lp.frameLock:
+            with lp.drawLock:
+                lp.frame.CopyFrom(self.scratch)
+            sent = lp.Flush()
+        self.frames += 1
+        self.sent += sent
+        self.frameTimes.append(now)
+        return sent
+
+    # -------------------------------------------------------------------------------------
+    # -- Returns the statistics as a dictionary:
+    # --   "fps"        measured frame rate, over the last 2 seconds (or so)
+    # --   "jitter_ms"  mean deviation of the frame starts from their schedule
+    # --   "max_jitter_ms", "frames", "dropped" (skipped frames), "messages" (sent)
+    # -------------------------------------------------------------------------------------
+    def Stats(self):
+        times = list(self.frameTimes)
+        jitter = list(self.jitter)
+        fps = 0.0
+        if len(times) > 1 and times[-1] > times[0]:
+            fps = (len(times) - 1) / (times[-1] - times[0])
+        return {
+            "fps": fps,
+            "jitter_ms": 1000.0 * sum(jitter) / len(jitter) if jitter else 0.0,
+            "max_jitter_ms": 1000.0 * max(jitter) if jitter else 0.0,
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "messages": self.sent,
+        }
+
+    # -------------------------------------------------------------------------------------
+    # -- One step of the render thread; Start(), Stop() and IsRunning() come with
+    # -- FixedRateThread.
+    # -------------------------------------------------------------------------------------
+    def Step(self, now, late):
+        self.jitter.append(late)
+        self.Tick(now)
+        return True
@@ -0,0 +1,117 @@
+#
+# Drives several Launchpads at once.
+#
+# Each device has its own MIDI ports (see class Midi), frame flushes are
+# fanned out to one output thread per device and the input events of all
+# devices are merged into a single stream, tagged with the device index.
+#
+#   grid = LaunchpadGroup()
+#   grid.Open( 4 )
+#   grid.devices[2].FrameCtrlXY( 0, 1, 3, 0 )
+#   grid.Flush()
+#   for index, ev in grid.GetEvents( 0.1 ):
+#       ...
+#
+
+import threading
+import concurrent.futures
+
+try:
+    from launchpad_py.launchpad import Launchpad
+except ImportError:
+    from launchpad import Launchpad
+
+
+########################################################################################
+# CLASS LaunchpadGroup
+###
+########################################################################################
+class LaunchpadGroup(object):
+
+    def __init__(self, deviceClass=Launchpad):
+        self.deviceClass = deviceClass
+        self.devices = []
+        self.executor = None
+        self.wake = threading.Event()
+
+    # -------------------------------------------------------------------------------------
+    # -- Opens up to <count> devices matching <name> (None: all that can be found),
+    # -- device number 0, 1, 2, ... and starts their background readers.
+    # -- Returns the number of opened devices.
+    # -------------------------------------------------------------------------------------
+    def Open(self, count=None, name="Launchpad", maxEvents=1024):
+        self.Close()
+
+        number = 0
+        while count is None or number < count:
+            lp = self.deviceClass()
+            if not lp.Open(number, name):
+                break
+            lp.ReaderStart(maxEvents, callback=self.OnEvent)
+            self.devices.append(lp)
+            number += 1
+
+        if self.devices:
+            self.executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=len(self.devices), thread_name_prefix="LaunchpadGroup")
+
+        return len(self.devices)
+
+    # -------------------------------------------------------------------------------------
+    # -- Closes all devices
+    # -------------------------------------------------------------------------------------
+    def Close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+        for lp in self.devices:
+            lp.Close()
+        self.devices = []
+
+    # -------------------------------------------------------------------------------------
+    # -- Called from the reader threads
+    # -------------------------------------------------------------------------------------
+    def OnEvent(self, ev):
+        self.wake.set()
+
+    # -------------------------------------------------------------------------------------
+    # -- Flushes the frame buffers of all devices in parallel (see Launchpad.Flush()).
+    # -- Returns a list with the number of MIDI messages sent to each device.
+    # -------------------------------------------------------------------------------------
+    def Flush(self):
+        if self.executor is None:
+            return []
+        futures = [self.executor.submit(lp.Flush) for lp in self.devices]
+        return [f.result() for f in futures]
+
+    # -------------------------------------------------------------------------------------
+    # -- Runs <func>( device, *args ) for all devices in parallel, e.g.:
+    # --   grid.Map( Launchpad.Reset )
+    # -- Returns a list of the results.
+    # -------------------------------------------------------------------------------------
+    def Map(self, func, *args):
+        if self.executor is None:
+            return []
+        futures = [self.executor.submit(func, lp, *args) for lp in self.devices]
+        return [f.result() for f in futures]
+
+    # -------------------------------------------------------------------------------------
+    # -- Returns the queued events of all devices as a list of [ <index>, <event> ],
+    # -- ordered by their timestamp (the last field of an event).
+    # -- If nothing is queued, waits up to <timeout> seconds (None: forever).
+    # -------------------------------------------------------------------------------------
+    def GetEvents(self, timeout=0):
+        while True:
+            self.wake.clear()
+            ret = []
+            for index, lp in enumerate(self.devices):
+                events = lp.readerEvents
+                while events:
+                    ret.append([index, events.popleft()])
+            if ret or timeout == 0 or not self.devices:
+                break
+            if not self.wake.wait(timeout):
+                break
+
+        ret.sort(key=lambda e: e[1][-1])
+        return ret
@@ -17,32 +17,116 @@
 #  >>>
 #
 
-import string
-import random
 import sys
 import array
+import threading
+import collections
 
-from pygame import midi
-from pygame import time
-
+from time import sleep, monotonic
 
 try:
-    from launchpad_py.charset import *
+    from launchpad_py.backend import PygameBackend
+    from launchpad_py.stats import MidiStats, StatsOutput, StatsInput
+    from launchpad_py.record import Recorder, RecordOutput, RecordInput
 except ImportError:
-    try:
-        from charset import *
-    except ImportError:
-        sys.exit("error loading Launchpad charset")
+    from backend import PygameBackend
+    from stats import MidiStats, StatsOutput, StatsInput
+    from record import Recorder, RecordOutput, RecordInput
+
+# Optional and expensive imports are deferred until they are needed, so importing this
+# module is quick: numpy (only required for the array functions), the charset and,
+# in backend.py, PyGame.
+
+# optional, only required for the array functions; see Numpy()
+numpy = None
+
+
+# -------------------------------------------------------------------------------------
+# -- Returns the numpy module; raises ImportError if it is not installed
+# -------------------------------------------------------------------------------------
+def Numpy():
+    global numpy
+    if numpy is None:
+        import numpy as module
+        numpy = module
+    return numpy
+
+
+# -------------------------------------------------------------------------------------
+# -- Removes the wrapper of class <cls> (StatsOutput, RecordInput, ...) from the chain
+# -- of port wrappers starting at <port>; returns the new start of the chain.
+# -------------------------------------------------------------------------------------
+def PortUnwrap(port, cls):
+    if isinstance(port, cls):
+        return port.port
+    outer = port
+    while hasattr(outer, "port"):
+        if isinstance(outer.port, cls):
+            outer.port = outer.port.port
+            break
+        outer = outer.port
+    return port
+
+
+# the font, 8 bytes per character; see Chartab()
+chartab = None
+
+
+# -------------------------------------------------------------------------------------
+# -- Returns CHARTAB, loaded from charset.py on first use
+# -------------------------------------------------------------------------------------
+def Chartab():
+    global chartab
+    if chartab is None:
+        try:
+            from launchpad_py.charset import CHARTAB
+        except ImportError:
+            try:
+                from charset import CHARTAB
+            except ImportError:
+                raise ImportError("error loading Launchpad charset")
+        chartab = CHARTAB
+    return chartab
+
+
+# -------------------------------------------------------------------------------------
+# -- Module attributes loaded on demand (PEP 562); keeps "launchpad.CHARTAB" working
+# -------------------------------------------------------------------------------------
+def __getattr__(name):
+    if name == "CHARTAB":
+        return Chartab()
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+##########################################################################################
+# Glyphs
+# Characters of CHARTAB, decoded to 8x8 bitmaps (tuple of 64 0/1 values, row by row)
+##########################################################################################
+GLYPHS = {}
+
+
+def GlyphBitmap(char):
+    bitmap = GLYPHS.get(char)
+    if bitmap is None:
+        rows = Chartab()[char * 8:char * 8 + 8]
+        bitmap = tuple(1 if row & (0x80 >> j) else 0 for row in rows for j in range(8))
+        GLYPHS[char] = bitmap
+    return bitmap
 
 
 ##########################################################################################
 # CLASS Midi
-# Midi singleton wrapper
+# Midi wrapper; one object per device, with its own in- and output ports.
+# The device registry (class __Midi) is a singleton, shared by all of them.
 ##########################################################################################
 class Midi:
 
     # instance created
     instanceMidi = None
+    # MIDI backend used by the instance; PyGame if None, see SetBackend()
+    backend = None
+    # with statistics on, ReadRaw() reads up to this many events at once; see StatsEnable()
+    STATS_READ_SIZE = 1024
 
     # ---------------------------------------------------------------------------------------
     #-- init
@@ -51,7 +135,9 @@ class Midi:
     def __init__(self):
         if Midi.instanceMidi is None:
             try:
-                Midi.instanceMidi = Midi.__Midi()
+                if Midi.backend is None:
+                    Midi.backend = PygameBackend()
+                Midi.instanceMidi = Midi.__Midi(Midi.backend)
             except:
                 # TODO: maybe sth like sys.exit()?
                 print("unable to initialize MIDI")
@@ -59,6 +145,48 @@ class Midi:
 
         self.devIn = None
         self.devOut = None
+        self.idIn = None
+        self.idOut = None
+
+        # batched output; see BatchBegin()
+        self.batchEnabled = True
+        self.batchChunkSize = 64
+        self.batchPauseMs = 0
+        self.batchDepth = 0
+        self.batchMsgs = []
+        # guards the batch state and the writes to the output port
+        self.writeLock = threading.RLock()
+
+        # instrumentation; see StatsEnable()
+        self.stats = None
+
+        # session log; see RecordStart()
+        self.recorder = None
+
+        # SysEx frames are assembled in here; see RawWriteSysEx()
+        self.sysexBuffer = bytearray(256)
+
+        # paced output; see SetRateLimit()
+        self.paceRate = None
+        self.paceBurst = 32
+        self.paceQueue = collections.OrderedDict()
+        self.paceSeq = 0
+        self.paceCond = threading.Condition()
+        self.paceThread = None
+        self.paceStop = False
+        self.paceBusy = False
+        self.paceSent = 0
+        self.paceCoalesced = 0
+
+        # lost input detection; see ReadRaw()
+        self.inOverflows = 0
+        self.inGaps = 0
+        self.inState = {}
+        self.inLastTime = 0
+        self.overflowCallback = None
+
+        # events read ahead, but not returned yet; see ReadRaw()
+        self.inPending = collections.deque()
 
     # ---------------------------------------------------------------------------------------
     #-- getattr
@@ -67,18 +195,36 @@ class Midi:
     def __getattr__(self, name):
         return getattr(self.instanceMidi, name)
 
+    # ---------------------------------------------------------------------------------------
+    # -- Selects another MIDI backend, e.g. a virtual Launchpad (see backend.py, virtual.py).
+    # -- Needs to be called before any Launchpad object is created.
+    # ---------------------------------------------------------------------------------------
+    @staticmethod
+    def SetBackend(backend):
+        Midi.backend = backend
+        Midi.instanceMidi = None
+
     # -------------------------------------------------------------------------------------
     # --
     # -------------------------------------------------------------------------------------
-    def OpenOutput(self, midi_id):
+    def OpenOutput(self, midi_id, bufferSize=None):
         if self.devOut is None:
+            if not self.Claim(midi_id, self):
+                return False
             try:
-                # PyGame's default size of the buffer is 4096.
-                # Removed code to tune that...
-                self.devOut = midi.Output(midi_id, 0)
+                # PyGame's default size of the buffer is 256 (None).
+                self.devOut = self.backend.OpenOutput(midi_id, 0, bufferSize)
             except:
                 self.devOut = None
+                self.Release(midi_id, self)
                 return False
+            self.idOut = midi_id
+            if self.stats is not None:
+                self.devOut = StatsOutput(self.devOut, self.stats)
+            if self.recorder is not None:
+                self.devOut = RecordOutput(self.devOut, self.recorder)
+            if self.paceRate is not None:
+                self.PaceStart()
         return True
 
     # -------------------------------------------------------------------------------------
@@ -86,25 +232,35 @@ class Midi:
     # -------------------------------------------------------------------------------------
     def CloseOutput(self):
         if self.devOut is not None:
+            self.PaceEnd()
             # self.devOut.close()
             del self.devOut
             self.devOut = None
+            self.Release(self.idOut, self)
+            self.idOut = None
 
     # -------------------------------------------------------------------------------------
     # --
     # -------------------------------------------------------------------------------------
     def OpenInput(self, midi_id, bufferSize=None):
         if self.devIn is None:
+            if not self.Claim(midi_id, self):
+                return False
             try:
-                # PyGame's default size of the buffer is 4096.
-                if bufferSize is None:
-                    self.devIn = midi.Input(midi_id)
-                else:
-                    # for experiments...
-                    self.devIn = midi.Input(midi_id, bufferSize)
+                # PyGame's default size of the buffer is 4096 (None).
+                self.devIn = self.backend.OpenInput(midi_id, bufferSize)
             except:
                 self.devIn = None
+                self.Release(midi_id, self)
                 return False
+            self.idIn = midi_id
+            self.inState = {}
+            self.inLastTime = 0
+            self.inPending.clear()
+            if self.stats is not None:
+                self.devIn = StatsInput(self.devIn, self.stats, self.GetTime)
+            if self.recorder is not None:
+                self.devIn = RecordInput(self.devIn, self.recorder)
         return True
 
     # -------------------------------------------------------------------------------------
@@ -115,24 +271,85 @@ class Midi:
             # self.devIn.close()
             del self.devIn
             self.devIn = None
+            self.Release(self.idIn, self)
+            self.idIn = None
 
     # -------------------------------------------------------------------------------------
     # --
     # -------------------------------------------------------------------------------------
     def ReadCheck(self):
-        return self.devIn.poll()
+        return len(self.inPending) > 0 or self.devIn.poll()
 
     # -------------------------------------------------------------------------------------
-    # --
+    # -- Returns up to <count> events, [ [ [stat, dat1, dat2, dat3], timestamp ], ... ]
+    # -- Lost events are detected and counted:
+    # --   <inOverflows>  PortMidi's input buffer overflowed (the read returns [])
+    # --   <inGaps>       a note or controller was pressed twice (or released twice) in a
+    # --                  row or a timestamp went backwards; i.e. something got lost
+    # -- For both, the optional overflow callback is called; see SetOverflowCallback().
+    # -- With statistics on, everything waiting (up to STATS_READ_SIZE events) is read at
+    # -- once, so the stats see the real input backlog; the rest is returned by the next
+    # -- calls.
+    # -------------------------------------------------------------------------------------
+    def ReadRaw(self, count=1):
+        pending = self.inPending
+        if pending:
+            return [pending.popleft() for i in range(min(count, len(pending)))]
+
+        try:
+            size = count if self.stats is None else max(count, self.STATS_READ_SIZE)
+            events = self.devIn.read(size)
+        except Exception as e:
+            if "overflow" not in str(e).lower():
+                raise
+            self.inOverflows += 1
+            if self.overflowCallback is not None:
+                self.overflowCallback("overflow", self.inOverflows)
+            return []
+
+        state = self.inState
+        gaps = 0
+        for data, timestamp in events:
+            if timestamp < self.inLastTime:
+                gaps += 1
+            self.inLastTime = timestamp
+            if data[0] & 0xe0 == 0x80 or data[0] & 0xf0 == 0xb0:
+                # note on/off and controllers
+                key = ((data[0] | 0x10) << 8) | data[1]
+                pressed = data[0] & 0xf0 != 0x80 and data[2] > 0
+                if state.get(key) is pressed:
+                    gaps += 1
+                state[key] = pressed
+
+        if gaps:
+            self.inGaps += gaps
+            if self.overflowCallback is not None:
+                self.overflowCallback("gap", self.inGaps)
+
+        if len(events) > count:
+            pending.extend(events[count:])
+            events = events[:count]
+        return events
+
+    # -------------------------------------------------------------------------------------
+    # -- Sets <callback>( kind, count ), called if input events got lost;
+    # -- <kind> is "overflow" or "gap" and <count> the total number of those.
     # -------------------------------------------------------------------------------------
-    def ReadRaw(self):
-        return self.devIn.read(1)
+    def SetOverflowCallback(self, callback):
+        self.overflowCallback = callback
 
     # -------------------------------------------------------------------------------------
     # -- sends a single, short message
     # -------------------------------------------------------------------------------------
     def RawWrite(self, stat, dat1, dat2):
-        self.devOut.write_short(stat, dat1, dat2)
+        with self.writeLock:
+            if self.batchDepth:
+                self.batchMsgs.append([[stat, dat1, dat2], 0])
+                return
+            if self.paceThread is not None:
+                self.PaceQueue([[[stat, dat1, dat2], 0]])
+                return
+            self.devOut.write_short(stat, dat1, dat2)
 
     # -------------------------------------------------------------------------------------
     # -- Sends a list of messages. If timestamp is 0, it is ignored.
@@ -141,26 +358,321 @@ class Midi:
     # -- <datN> fields are optional
     # -------------------------------------------------------------------------------------
     def RawWriteMulti(self, lstMessages):
-        self.devOut.write(lstMessages)
+        with self.writeLock:
+            if self.batchDepth:
+                self.batchMsgs.extend(lstMessages)
+                return
+            if self.paceThread is not None:
+                self.PaceQueue(lstMessages)
+                return
+            self.devOut.write(lstMessages)
 
     # -------------------------------------------------------------------------------------
     # -- Sends a single system-exclusive message, given by list <lstMessage>
     # -- The start (0xF0) and end bytes (0xF7) are added automatically.
     # -- [ <dat1>, <dat2>, ..., <datN> ]
+    # -- Instead of a list, <lstMessage> can also be bytes, a bytearray or a memoryview.
     # -- Timestamp is not supported and will be sent as '0' (for now)
     # -------------------------------------------------------------------------------------
     def RawWriteSysEx(self, lstMessage, timeStamp=0):
-        # There's a bug in PyGame's (Python 3) list-type message handling, so as a workaround,
-        # we'll use the string-type message instead...
-        # self.devOut.write_sys_ex( timeStamp, [0xf0] + lstMessage + [0xf7] ) # old Python 2
+        self.RawWriteSysExMulti((lstMessage,), timeStamp)
 
-        # array.tostring() deprecated in 3.9; quickfix ahead
-        try:
-            self.devOut.write_sys_ex(timeStamp, array.array(
-                'B', [0xf0] + lstMessage + [0xf7]).tostring())
-        except:
-            self.devOut.write_sys_ex(timeStamp, array.array(
-                'B', [0xf0] + lstMessage + [0xf7]).tobytes())
+    # -------------------------------------------------------------------------------------
+    # -- Sends several system-exclusive messages, given by a list of payloads as for
+    # -- RawWriteSysEx(), in one go.
+    # -- With a rate limit, they are queued behind the paced messages, like those.
+    # -------------------------------------------------------------------------------------
+    def RawWriteSysExMulti(self, lstMessages, timeStamp=0):
+        # The buffer is shared by all threads; it's only used under the write lock.
+        with self.writeLock:
+            # All frames are assembled in one reusable buffer, F0 <payload> F7, back to back.
+            # PortMidi stops at the first F7, so each frame is sent on its own.
+            # (PyGame's list-type messages are buggy in Python 3, hence bytes.)
+            buf = self.sysexBuffer
+            size = sum(len(msg) + 2 for msg in lstMessages)
+            if size > len(buf):
+                buf = self.sysexBuffer = bytearray(1 << (size - 1).bit_length())
+
+            ends = []
+            pos = 0
+            for msg in lstMessages:
+                end = pos + 1 + len(msg)
+                buf[pos] = 0xf0
+                buf[pos+1:end] = msg
+                buf[end] = 0xf7
+                pos = end + 1
+                ends.append(pos)
+
+            # keep the order of a pending batch
+            if self.batchMsgs:
+                self.BatchSend()
+
+            view = memoryview(buf)
+            if self.paceThread is not None:
+                # a SysEx frame is queued as [ <bytes>, timestamp ]; see PaceWrite()
+                frames = []
+                start = 0
+                for end in ends:
+                    frames.append([view[start:end].tobytes(), timeStamp])
+                    start = end
+                self.PaceQueue(frames)
+                return
+            write = self.devOut.write_sys_ex
+            start = 0
+            for end in ends:
+                write(timeStamp, view[start:end].tobytes())
+                start = end
+
+    # -------------------------------------------------------------------------------------
+    # -- Turns the instrumentation of this object's ports on or off.
+    # -- If on, <stats> is a MidiStats object (see stats.py) with message and byte counters,
+    # -- histograms of the write and read times and hooks; input is read in bulk to measure
+    # -- the backlog (see ReadRaw()). If off, <stats> is None and the ports are used
+    # -- directly, without any overhead.
+    # -- Returns the MidiStats object (or None).
+    # -------------------------------------------------------------------------------------
+    def StatsEnable(self, enable=True):
+        if enable and self.stats is None:
+            self.stats = MidiStats()
+            if self.devOut is not None:
+                self.devOut = StatsOutput(self.devOut, self.stats)
+            if self.devIn is not None:
+                self.devIn = StatsInput(self.devIn, self.stats, self.GetTime)
+        elif not enable and self.stats is not None:
+            self.stats = None
+            self.devOut = PortUnwrap(self.devOut, StatsOutput)
+            self.devIn = PortUnwrap(self.devIn, StatsInput)
+        return self.stats
+
+    # -------------------------------------------------------------------------------------
+    # -- Starts logging all MIDI traffic of this object to the binary file <path> (or an
+    # -- open binary file); see record.py. Messages written and events read are appended
+    # -- with their MIDI time (GetTime()), as fixed size records. An existing log is
+    # -- continued. Returns the Recorder object.
+    # -------------------------------------------------------------------------------------
+    def RecordStart(self, path):
+        self.RecordStop()
+        self.recorder = Recorder(path, self.GetTime)
+        if self.devOut is not None:
+            self.PaceDrain()
+            self.devOut = RecordOutput(self.devOut, self.recorder)
+        if self.devIn is not None:
+            self.devIn = RecordInput(self.devIn, self.recorder)
+        return self.recorder
+
+    # -------------------------------------------------------------------------------------
+    # -- Stops logging and closes the log file. Returns the number of records written.
+    # -------------------------------------------------------------------------------------
+    def RecordStop(self):
+        recorder = self.recorder
+        if recorder is None:
+            return 0
+        if self.devOut is not None:
+            self.PaceDrain()
+        self.recorder = None
+        self.devOut = PortUnwrap(self.devOut, RecordOutput)
+        self.devIn = PortUnwrap(self.devIn, RecordInput)
+        recorder.Close()
+        return recorder.records
+
+    # -------------------------------------------------------------------------------------
+    # -- Configures the batched output mode.
+    # -- <chunkSize> is the max. number of messages per PortMidi write (1..1024),
+    # -- <pauseMs> an optional delay between two chunks, for devices that choke on bursts.
+    # -- If disabled, BatchBegin() and BatchEnd() do nothing.
+    # -------------------------------------------------------------------------------------
+    def SetBatching(self, enabled=True, chunkSize=None, pauseMs=None):
+        if not enabled:
+            self.BatchSend()
+        self.batchEnabled = enabled
+        if chunkSize is not None:
+            self.batchChunkSize = max(1, min(1024, int(chunkSize)))
+        if pauseMs is not None:
+            self.batchPauseMs = max(0, int(pauseMs))
+
+    # -------------------------------------------------------------------------------------
+    # -- Starts collecting all messages of one logical update, instead of sending them
+    # -- one by one. Calls may be nested; the messages go out with the outermost BatchEnd().
+    # -------------------------------------------------------------------------------------
+    def BatchBegin(self):
+        if self.batchEnabled:
+            with self.writeLock:
+                self.batchDepth += 1
+
+    # -------------------------------------------------------------------------------------
+    # -- Ends a batch started with BatchBegin(); sends everything if it was the last one.
+    # -------------------------------------------------------------------------------------
+    def BatchEnd(self):
+        with self.writeLock:
+            if self.batchDepth == 0:
+                return
+            self.batchDepth -= 1
+            if self.batchDepth == 0 and self.batchMsgs:
+                self.BatchSend()
+
+    # -------------------------------------------------------------------------------------
+    # -- Sends all collected messages in chunks of <batchChunkSize>.
+    # -- All timestamps are 0, so PortMidi sends them immediately (the Launchpad gets
+    # -- confused by "real" timestamps; see LedCtrlRawRapid()).
+    # -------------------------------------------------------------------------------------
+    def BatchSend(self):
+        with self.writeLock:
+            msgs = self.batchMsgs
+            self.batchMsgs = []
+            if self.paceThread is not None:
+                self.PaceQueue(msgs)
+                return
+            size = self.batchChunkSize
+
+            for i in range(0, len(msgs), size):
+                if i and self.batchPauseMs:
+                    self.Wait(self.batchPauseMs)
+                self.devOut.write(msgs[i:i+size])
+
+    # -------------------------------------------------------------------------------------
+    # -- Limits the output to <msgsPerSec> messages per second, with bursts of up to <burst>
+    # -- messages; None turns the limit off (the default).
+    # -- With a limit, all messages go through a queue, sent by a background thread.
+    # -- If a message for an LED is queued while an older one for the same LED is still
+    # -- waiting, only the new one is kept, so bursts collapse to the latest state.
+    # -- Rapid updates can not be coalesced; Launchpad.Flush() sends LED by LED while
+    # -- the output is paced. SysEx messages are paced, too, one token each.
+    # -------------------------------------------------------------------------------------
+    def SetRateLimit(self, msgsPerSec=None, burst=32):
+        if msgsPerSec is not None and msgsPerSec <= 0:
+            raise ValueError("msgsPerSec must be > 0 (or None for no limit)")
+        self.PaceEnd()
+        self.paceRate = msgsPerSec
+        self.paceBurst = max(1, int(burst))
+        if msgsPerSec is not None and self.devOut is not None:
+            self.PaceStart()
+
+    # -------------------------------------------------------------------------------------
+    # -- Queues messages for the pacing thread.
+    # -- Messages for LEDs (note on/off and the top row controllers) are keyed by their
+    # -- LED, everything else (resets, rapid updates, ...) gets a unique key and keeps its
+    # -- place in the queue.
+    # -------------------------------------------------------------------------------------
+    def PaceQueue(self, lstMessages):
+        with self.paceCond:
+            queue = self.paceQueue
+            for item in lstMessages:
+                msg = item[0]
+                stat = msg[0]
+                if (stat == 144 or stat == 128) and len(msg) > 1:
+                    key = (144 << 8) | msg[1]
+                elif stat == 176 and len(msg) > 1 and msg[1] >= 104:
+                    key = (176 << 8) | msg[1]
+                else:
+                    self.paceSeq += 1
+                    key = -self.paceSeq
+                if key in queue:
+                    self.paceCoalesced += 1
+                    queue.move_to_end(key)
+                queue[key] = item
+            self.paceCond.notify_all()
+
+    # -------------------------------------------------------------------------------------
+    # -- True if the output is paced; see SetRateLimit()
+    # -------------------------------------------------------------------------------------
+    def Paced(self):
+        return self.paceThread is not None
+
+    # -------------------------------------------------------------------------------------
+    # -- Waits up to <timeout> seconds (None: forever) until all queued messages were sent;
+    # -- True if they were.
+    # -------------------------------------------------------------------------------------
+    def PaceDrain(self, timeout=None):
+        if self.paceThread is None:
+            return True
+        with self.paceCond:
+            return self.paceCond.wait_for(
+                lambda: not self.paceQueue and not self.paceBusy, timeout)
+
+    # -------------------------------------------------------------------------------------
+    # -- Starts the pacing thread
+    # -------------------------------------------------------------------------------------
+    def PaceStart(self):
+        if self.paceThread is not None:
+            return
+        self.paceStop = False
+        self.paceThread = threading.Thread(target=self.PaceLoop, name="MidiPacer")
+        self.paceThread.daemon = True
+        self.paceThread.start()
+
+    # -------------------------------------------------------------------------------------
+    # -- Stops the pacing thread; queued messages are sent right away
+    # -------------------------------------------------------------------------------------
+    def PaceEnd(self):
+        thread = self.paceThread
+        if thread is None:
+            return
+        with self.paceCond:
+            self.paceStop = True
+            self.paceCond.notify_all()
+        thread.join()
+        self.paceThread = None
+
+        with self.paceCond:
+            msgs = list(self.paceQueue.values())
+            self.paceQueue.clear()
+        self.paceSent += len(msgs)
+        # PyGame refuses to write more than 1024 events at once
+        size = self.batchChunkSize
+        for i in range(0, len(msgs), size):
+            self.PaceWrite(msgs[i:i+size])
+
+    # -------------------------------------------------------------------------------------
+    # -- Writes paced messages <msgs>; runs of short messages in one write, SysEx frames
+    # -- (queued by RawWriteSysExMulti()) on their own.
+    # -------------------------------------------------------------------------------------
+    def PaceWrite(self, msgs):
+        with self.writeLock:
+            devOut = self.devOut
+            run = []
+            for item in msgs:
+                if type(item[0]) is bytes:
+                    if run:
+                        devOut.write(run)
+                        run = []
+                    devOut.write_sys_ex(item[1], item[0])
+                else:
+                    run.append(item)
+            if run:
+                devOut.write(run)
+
+    # -------------------------------------------------------------------------------------
+    # -- The pacing thread; a token bucket
+    # -------------------------------------------------------------------------------------
+    def PaceLoop(self):
+        cond = self.paceCond
+        queue = self.paceQueue
+        tokens = self.paceBurst
+        last = monotonic()
+
+        while True:
+            with cond:
+                self.paceBusy = False
+                cond.notify_all()
+                while not queue and not self.paceStop:
+                    cond.wait()
+                if self.paceStop:
+                    return
+
+                now = monotonic()
+                tokens = min(self.paceBurst, tokens + (now - last) * self.paceRate)
+                last = now
+                if tokens < 1:
+                    cond.wait((1 - tokens) / self.paceRate)
+                    continue
+
+                count = min(int(tokens), len(queue), self.batchChunkSize)
+                msgs = [queue.popitem(last=False)[1] for i in range(count)]
+                tokens -= count
+                self.paceBusy = True
+
+            self.paceSent += count
+            self.PaceWrite(msgs)
 
     ########################################################################################
     # CLASS __Midi
@@ -172,11 +684,24 @@ class Midi:
         # -------------------------------------------------------------------------------------
         #-- init
         # -------------------------------------------------------------------------------------
-        def __init__(self):
+        def __init__(self, backend):
+            self.backend = backend
             # exception handling moved up to Midi()
-            midi.init()
+            backend.Init()
             # but I can't remember why I put this one in here...
-            midi.get_count()
+            backend.GetCount()
+
+            # MIDI id -> Midi object that has the port open
+            self.owners = {}
+            self.lock = threading.RLock()
+
+            # device index; see Rescan()
+            self.devices = []
+            self.index = {}
+            self.searches = {}
+            self.watcher = None
+            self.watcherStop = threading.Event()
+            self.Rescan()
 
         # -------------------------------------------------------------------------------------
         # -- del
@@ -184,30 +709,152 @@ class Midi:
         # -- exist(ed) until we start to count them...
         # -------------------------------------------------------------------------------------
         def __del__(self):
-            # midi.quit()
+            # self.backend.Quit()
             pass
 
+        # -------------------------------------------------------------------------------------
+        # -- (Re-)builds the device index. Only called once at startup, the result is cached.
+        # -- PortMidi only enumerates devices when it's initialized, so new or removed
+        # -- devices will only show up if <reinit> is True. As that invalidates all open
+        # -- ports, it is refused (returns False) while any port is open.
+        # -------------------------------------------------------------------------------------
+        def Rescan(self, reinit=False):
+            with self.lock:
+                if reinit:
+                    if self.owners:
+                        return False
+                    self.backend.Quit()
+                    self.backend.Init()
+
+                devices = []
+                index = {}
+                for n in range(self.backend.GetCount()):
+                    md = self.backend.GetDeviceInfo(n)
+                    name = md[1].decode(errors="replace") if isinstance(md[1], bytes) else str(md[1])
+                    name = name.strip().lower()
+                    devices.append((name, md))
+                    if md[2] > 0:
+                        index.setdefault((name, "in"), []).append(n)
+                    if md[3] > 0:
+                        index.setdefault((name, "out"), []).append(n)
+
+                self.devices = devices
+                self.index = index
+                self.searches = {}
+            return True
+
+        # -------------------------------------------------------------------------------------
+        # -- Returns the device index: { ( <lowercase name>, "in"/"out" ): [ <MIDI ids> ] }
+        # -------------------------------------------------------------------------------------
+        def GetIndex(self):
+            return self.index
+
+        # -------------------------------------------------------------------------------------
+        # -- Starts a thread that checks for added or removed devices every <interval>
+        # -- seconds and calls <callback>( added, removed ) with lists of index keys
+        # -- ( <name>, "in"/"out" ) if anything changed; one entry per port, so adding a
+        # -- third device of a kind reports its keys once more.
+        # -- See Rescan(): Devices can only be detected while no port is open, which is
+        # -- exactly the case when waiting for a device to be (re)connected.
+        # -------------------------------------------------------------------------------------
+        def WatchStart(self, callback, interval=2.0):
+            if self.watcher is not None:
+                return
+            self.watcherStop.clear()
+            self.watcher = threading.Thread(
+                target=self.WatchLoop, args=(callback, interval), name="MidiWatcher")
+            self.watcher.daemon = True
+            self.watcher.start()
+
+        # -------------------------------------------------------------------------------------
+        # -- Stops the device watcher
+        # -------------------------------------------------------------------------------------
+        def WatchStop(self):
+            if self.watcher is None:
+                return
+            self.watcherStop.set()
+            if self.watcher is not threading.current_thread():
+                self.watcher.join()
+            self.watcher = None
+
+        # -------------------------------------------------------------------------------------
+        # -- The watcher thread
+        # -------------------------------------------------------------------------------------
+        def WatchLoop(self, callback, interval):
+            while not self.watcherStop.wait(interval):
+                before = self.PortCount()
+                if not self.Rescan(reinit=True):
+                    continue
+                after = self.PortCount()
+                if before != after:
+                    # one entry per port, so identical devices are told apart
+                    callback(sorted((after - before).elements()), sorted((before - after).elements()))
+
+        # -------------------------------------------------------------------------------------
+        # -- Returns the number of ports per index key, as a Counter
+        # -------------------------------------------------------------------------------------
+        def PortCount(self):
+            return collections.Counter(dict((key, len(ids)) for key, ids in self.index.items()))
+
         # -------------------------------------------------------------------------------------
         # -- Returns a list of devices that matches the string 'name' and has in- or outputs.
+        # -- Served from the device index; see Rescan().
         # -------------------------------------------------------------------------------------
         def SearchDevices(self, name, output=True, input=True, quiet=True):
             ret = []
-            i = 0
-
-            for n in range(midi.get_count()):
-                md = midi.get_device_info(n)
-                if str(md[1].lower()).find(name.lower()) >= 0:
-                    if quiet == False:
-                        print('%2d' % (i), md)
-                        sys.stdout.flush()
-                    if output == True and md[3] > 0:
-                        ret.append(i)
-                    if input == True and md[2] > 0:
-                        ret.append(i)
-                i += 1
+            name = name.lower()
+
+            with self.lock:
+                if quiet:
+                    ret = self.searches.get((name, output, input))
+                    if ret is not None:
+                        return list(ret)
+                    ret = []
+
+                # a few names to match, instead of all ports
+                matched = []
+                for (devName, direction), ids in self.index.items():
+                    if devName.find(name) >= 0:
+                        matched.extend(ids)
+                        if (direction == "out" and output == True) or (direction == "in" and input == True):
+                            ret.extend(ids)
+                ret.sort()
+
+                if quiet == False:
+                    for i in sorted(set(matched)):
+                        print('%2d' % (i), self.devices[i][1])
+                    sys.stdout.flush()
+
+                self.searches[(name, output, input)] = list(ret)
 
             return ret
 
+        # -------------------------------------------------------------------------------------
+        # -- Reserves the port <midi_id> for the Midi object <owner>.
+        # -- Returns False if another Midi object already has it open.
+        # -------------------------------------------------------------------------------------
+        def Claim(self, midi_id, owner):
+            with self.lock:
+                if self.owners.get(midi_id, owner) is not owner:
+                    return False
+                self.owners[midi_id] = owner
+                return True
+
+        # -------------------------------------------------------------------------------------
+        # -- Releases a port reserved with Claim()
+        # -------------------------------------------------------------------------------------
+        def Release(self, midi_id, owner):
+            with self.lock:
+                if self.owners.get(midi_id) is owner:
+                    del self.owners[midi_id]
+
+        # -------------------------------------------------------------------------------------
+        # -- Returns the registry lock. While it's held, Rescan() can not run, so MIDI ids
+        # -- found with SearchDevice() stay valid until they are claimed (opened).
+        # -------------------------------------------------------------------------------------
+        def RegistryLock(self):
+            return self.lock
+
         # -------------------------------------------------------------------------------------
         # -- Returns the first device that matches the string 'name'.
         # -- NEW2015/02: added number argument to pick from several devices (if available)
@@ -224,7 +871,13 @@ class Midi:
         # -- Return MIDI time
         # -------------------------------------------------------------------------------------
         def GetTime(self):
-            return midi.time()
+            return self.backend.GetTime()
+
+        # -------------------------------------------------------------------------------------
+        # -- Waits <ms> milliseconds
+        # -------------------------------------------------------------------------------------
+        def Wait(self, ms):
+            self.backend.Wait(ms)
 
 
 ########################################################################################
@@ -233,6 +886,13 @@ class Midi:
 ########################################################################################
 class LaunchpadBase(object):
 
+    # Default MIDI buffer sizes (events) for Open().
+    # A full press and release sweep over a Launchpad's 80 buttons creates 160 events;
+    # the input buffer holds more than 25 of them. The output buffer only matters for
+    # batched writes (see Midi.SetBatching()) and holds a dozen complete rapid updates.
+    INPUT_BUFFER_SIZE = 4096
+    OUTPUT_BUFFER_SIZE = 512
+
     def __init__(self):
         self.midi = Midi()  # midi interface instance (singleton)
         self.idOut = None   # midi id for output
@@ -243,6 +903,14 @@ class LaunchpadBase(object):
         self.SCROLL_LEFT = -1
         self.SCROLL_RIGHT = 1
 
+        # background reader; see ReaderStart()
+        self.reader = None
+        self.readerStop = threading.Event()
+        self.readerWake = threading.Event()
+        self.readerEvents = collections.deque()
+        self.readerCallback = None
+        self.readerDropped = 0
+
     # LOL; That fixes a years old bug. Officially an idiot now :)
 #	def __delete__( self ):
     def __del__(self):
@@ -250,18 +918,27 @@ class LaunchpadBase(object):
 
     # -------------------------------------------------------------------------------------
     # -- Opens one of the attached Launchpad MIDI devices.
+    # -- Optionally with the MIDI buffer sizes <bufferSizeIn> and <bufferSizeOut> (events);
+    # -- None uses INPUT_BUFFER_SIZE and OUTPUT_BUFFER_SIZE.
     # -------------------------------------------------------------------------------------
-    def Open(self, number=0, name="Launchpad"):
-        self.idOut = self.midi.SearchDevice(name, True, False, number=number)
-        self.idIn = self.midi.SearchDevice(name, False, True, number=number)
-
-        if self.idOut is None or self.idIn is None:
-            return False
+    def Open(self, number=0, name="Launchpad", bufferSizeIn=None, bufferSizeOut=None):
+        if bufferSizeIn is None:
+            bufferSizeIn = self.INPUT_BUFFER_SIZE
+        if bufferSizeOut is None:
+            bufferSizeOut = self.OUTPUT_BUFFER_SIZE
+
+        # no rescan (see WatchStart()) between the lookup and the claim of the ports
+        with self.midi.RegistryLock():
+            self.idOut = self.midi.SearchDevice(name, True, False, number=number)
+            self.idIn = self.midi.SearchDevice(name, False, True, number=number)
+
+            if self.idOut is None or self.idIn is None:
+                return False
 
-        if self.midi.OpenOutput(self.idOut) == False:
-            return False
+            if self.midi.OpenOutput(self.idOut, bufferSizeOut) == False:
+                return False
 
-        return self.midi.OpenInput(self.idIn)
+            return self.midi.OpenInput(self.idIn, bufferSizeIn)
 
     # -------------------------------------------------------------------------------------
     # -- Checks if a device exists, but does not open it.
@@ -280,6 +957,7 @@ class LaunchpadBase(object):
     # -- Closes this device
     # -------------------------------------------------------------------------------------
     def Close(self):
+        self.ReaderStop()
         self.midi.CloseInput()
         self.midi.CloseOutput()
 
@@ -291,30 +969,366 @@ class LaunchpadBase(object):
 
     # -------------------------------------------------------------------------------------
     # -- Clears the button buffer (The Launchpads remember everything...)
-    # -- Because of empty reads (timeouts), there's nothing more we can do here, but
-    # -- repeat the polls and wait a little...
-    # -------------------------------------------------------------------------------------
-    def ButtonFlush(self):
-        doReads = 0
-        # wait for that amount of consecutive read fails to exit
-        while doReads < 3:
-            if self.midi.ReadCheck():
-                doReads = 0
-                self.midi.ReadRaw()
+    # -- Events are read in bulk until the input stayed empty for <quietMs> milliseconds,
+    # -- but not longer than <timeoutMs> in total, even if a button keeps sending.
+    # -- Returns the number of discarded events.
+    # -------------------------------------------------------------------------------------
+    def ButtonFlush(self, quietMs=10, timeoutMs=500):
+        if self.reader is not None:
+            discarded = len(self.readerEvents)
+            self.readerEvents.clear()
+            return discarded
+
+        midi = self.midi
+        discarded = 0
+        start = quiet = midi.GetTime()
+        while True:
+            if midi.ReadCheck():
+                discarded += len(midi.ReadRaw(256))
+                quiet = midi.GetTime()
             else:
-                doReads += 1
-                time.wait(5)
+                now = midi.GetTime()
+                if now - quiet >= quietMs or now - start >= timeoutMs:
+                    break
+                midi.Wait(1)
+            if quiet - start >= timeoutMs:
+                break
+
+        return discarded
 
     # -------------------------------------------------------------------------------------
     # -- Returns a list of all MIDI events, empty list if nothing happened.
     # -- Useful for debugging or checking new devices.
     # -------------------------------------------------------------------------------------
     def EventRaw(self):
-        if self.midi.ReadCheck():
+        if self.reader is None and self.midi.ReadCheck():
             return self.midi.ReadRaw()
         else:
             return []
 
+    # -------------------------------------------------------------------------------------
+    # -- Decodes a single MIDI message <data> ([stat, dat1, dat2, dat3]), received at
+    # -- <timestamp>, into an event record for the background reader.
+    # -- Returns None for messages that should be ignored.
+    # -- Device specific; the default keeps the raw message.
+    # -------------------------------------------------------------------------------------
+    def EventDecode(self, data, timestamp):
+        return (data[0], data[1], data[2], timestamp)
+
+    # -------------------------------------------------------------------------------------
+    # -- Called by the input paths whenever all pending input was read, for time based
+    # -- button events. Device specific; nothing to do by default.
+    # -------------------------------------------------------------------------------------
+    def ButtonCheck(self):
+        pass
+
+    # -------------------------------------------------------------------------------------
+    # -- Starts a background thread that reads all MIDI input in bulk, decodes it with
+    # -- EventDecode() and puts the records into a queue of up to <maxEvents> entries
+    # -- (the oldest ones are dropped and counted in <readerDropped>).
+    # -- The optional <callback> is called from the reader thread for each new event.
+    # -- <pollInterval> (s) is the idle time between two polls; PortMidi can't block.
+    # -- While the reader runs, ButtonChanged(), ButtonStateRaw() and ButtonStateXY()
+    # -- are served from the queue. Use GetEvents() or WaitEvent() to block until
+    # -- something happens.
+    # -------------------------------------------------------------------------------------
+    def ReaderStart(self, maxEvents=1024, callback=None, pollInterval=0.0005, readSize=256):
+        if self.reader is not None:
+            return True
+        if self.midi.devIn is None:
+            return False
+
+        self.readerEvents = collections.deque(maxlen=maxEvents)
+        self.readerCallback = callback
+        self.readerDropped = 0
+        self.readerStop.clear()
+        self.reader = threading.Thread(
+            target=self.ReaderLoop, args=(pollInterval, readSize), name="LaunchpadReader")
+        self.reader.daemon = True
+        self.reader.start()
+        return True
+
+    # -------------------------------------------------------------------------------------
+    # -- Stops the background reader; events still queued are kept.
+    # -------------------------------------------------------------------------------------
+    def ReaderStop(self):
+        if self.reader is None:
+            return
+        self.readerStop.set()
+        if self.reader is not threading.current_thread():
+            self.reader.join()
+        self.reader = None
+        self.readerWake.set()
+
+    # -------------------------------------------------------------------------------------
+    # -- The reader thread
+    # -------------------------------------------------------------------------------------
+    def ReaderLoop(self, pollInterval, readSize):
+        midi = self.midi
+        events = self.readerEvents
+        decode = self.EventDecode
+        stop = self.readerStop
+        wake = self.readerWake
+
+        while not stop.is_set():
+            if not midi.ReadCheck():
+                self.ButtonCheck()
+                sleep(pollInterval)
+                continue
+
+            callback = self.readerCallback
+            for data, timestamp in midi.ReadRaw(readSize):
+                ev = decode(data, timestamp)
+                if ev is None:
+                    continue
+                if len(events) == events.maxlen:
+                    self.readerDropped += 1
+                events.append(ev)
+                if callback is not None:
+                    callback(ev)
+            wake.set()
+
+    # -------------------------------------------------------------------------------------
+    # -- Returns the next queued event of the background reader or None.
+    # -------------------------------------------------------------------------------------
+    def ReaderPop(self):
+        try:
+            return self.readerEvents.popleft()
+        except IndexError:
+            return None
+
+    # -------------------------------------------------------------------------------------
+    # -- Waits up to <timeout> seconds (None: forever) for the next event of the
+    # -- background reader. Returns the event or None on timeout.
+    # -------------------------------------------------------------------------------------
+    def WaitEvent(self, timeout=None):
+        events = self.readerEvents
+        wake = self.readerWake
+
+        while True:
+            wake.clear()
+            if events:
+                return events.popleft()
+            if self.reader is None:
+                return None
+            if not wake.wait(timeout):
+                return None
+            # only wait once; a second round just checks the queue
+            if timeout is not None:
+                timeout = 0
+
+    # -------------------------------------------------------------------------------------
+    # -- Returns a list of all queued events of the background reader.
+    # -- If nothing is queued, waits up to <timeout> seconds (None: forever) for
+    # -- at least one event. Returns an empty list on timeout.
+    # -------------------------------------------------------------------------------------
+    def GetEvents(self, timeout=0):
+        ev = self.WaitEvent(timeout)
+        if ev is None:
+            return []
+
+        ret = [ev]
+        events = self.readerEvents
+        while events:
+            ret.append(events.popleft())
+        return ret
+
+
+########################################################################################
+# CLASS LedFrame
+###
+# A 9x9 LED frame buffer, addressed exactly like LedCtrlXY() (incl. the top automap row).
+# Holds Launchpad color codes, as returned by LedGetColor().
+# Cell (8/0) does not exist on the device and is never sent.
+########################################################################################
+class LedFrame(object):
+
+    WIDTH = 9
+    HEIGHT = 9
+
+    def __init__(self, code=0):
+        self.cells = [code] * (self.WIDTH * self.HEIGHT)
+
+    # -------------------------------------------------------------------------------------
+    # -- Sets the color code of cell <x>/<y>; coordinates outside the grid are ignored.
+    # -------------------------------------------------------------------------------------
+    def SetXY(self, x, y, code):
+        if x < 0 or x > 8 or y < 0 or y > 8:
+            return
+        self.cells[y * 9 + x] = code
+
+    # -------------------------------------------------------------------------------------
+    # -- Returns the color code of cell <x>/<y>
+    # -------------------------------------------------------------------------------------
+    def GetXY(self, x, y):
+        return self.cells[y * 9 + x]
+
+    # -------------------------------------------------------------------------------------
+    # -- Sets all cells to color code <code>
+    # -------------------------------------------------------------------------------------
+    def Clear(self, code=0):
+        self.cells[:] = [code] * (self.WIDTH * self.HEIGHT)
+
+    # -------------------------------------------------------------------------------------
+    # -- Copies all cells from another LedFrame
+    # -------------------------------------------------------------------------------------
+    def CopyFrom(self, other):
+        self.cells[:] = other.cells
+
+
+########################################################################################
+# CLASS ButtonEvents
+###
+# A reusable buffer of decoded button events; see Launchpad.ButtonStateBatch().
+# The fields are kept in parallel arrays, event <i> is
+#   x[i], y[i], pressed[i], timestamp[i]   for i in range( count )
+# so reading a bulk of events does not allocate anything per event.
+########################################################################################
+class ButtonEvents(object):
+
+    __slots__ = ("size", "count", "x", "y", "pressed", "timestamp")
+
+    def __init__(self, size=256):
+        self.size = size
+        self.count = 0
+        self.x = array.array("B", bytes(size))
+        self.y = array.array("B", bytes(size))
+        self.pressed = array.array("B", bytes(size))
+        self.timestamp = array.array("q", bytes(8 * size))
+
+    # -------------------------------------------------------------------------------------
+    # -- Returns event <i> as ( <x>, <y>, <True/False>, <timestamp> )
+    # -------------------------------------------------------------------------------------
+    def Get(self, i):
+        return (self.x[i], self.y[i], self.pressed[i] != 0, self.timestamp[i])
+
+
+########################################################################################
+# CLASS ButtonMatrix
+###
+# Live state of the 9x9 buttons, laid out like class LedFrame (X/Y); updated by the
+# input path of class Launchpad. Times are MIDI timestamps in ms.
+#   pressed[]     1 if the button is held down
+#   pressTime[]   time of the last press
+#   releaseTime[] time of the last release
+#   taps[]        number of presses in a row, each within <doubleTapMs> of the previous
+# A press that follows the previous one within <doubleTapMs> is a double tap, a button
+# held for <longPressMs> or more a long press.
+########################################################################################
+class ButtonMatrix(object):
+
+    def __init__(self, doubleTapMs=300, longPressMs=500):
+        self.doubleTapMs = doubleTapMs
+        self.longPressMs = longPressMs
+        self.pressed = bytearray(81)
+        self.pressTime = [0] * 81
+        self.releaseTime = [0] * 81
+        self.taps = [0] * 81
+        self.callback = None
+        # pressed buttons that did not get their "longpress" yet and the earliest time
+        # one of them may be due; see Check()
+        self.holding = set()
+        self.longDue = 0
+
+    # -------------------------------------------------------------------------------------
+    # -- Sets <callback>( kind, x, y, timestamp ), called from the input path for each
+    # -- "press", "release", "doubletap" (after its press) and "longpress" (once per press,
+    # -- as soon as the button is held for <longPressMs>; see Check()).
+    # -------------------------------------------------------------------------------------
+    def SetCallback(self, callback):
+        self.callback = callback
+
+    # -------------------------------------------------------------------------------------
+    # -- Applies a button event
+    # -------------------------------------------------------------------------------------
+    def Update(self, x, y, pressed, timestamp):
+        i = y * 9 + x
+        callback = self.callback
+        if pressed:
+            if self.taps[i] and timestamp - self.pressTime[i] <= self.doubleTapMs:
+                self.taps[i] += 1
+            else:
+                self.taps[i] = 1
+            self.pressTime[i] = timestamp
+            self.pressed[i] = 1
+            if not self.holding or timestamp + self.longPressMs < self.longDue:
+                self.longDue = timestamp + self.longPressMs
+            self.holding.add(i)
+            if callback is not None:
+                callback("press", x, y, timestamp)
+                if self.taps[i] == 2:
+                    callback("doubletap", x, y, timestamp)
+        else:
+            self.releaseTime[i] = timestamp
+            self.pressed[i] = 0
+            if i in self.holding:
+                # not checked in time; late, but still before the release
+                self.holding.discard(i)
+                if callback is not None and timestamp - self.pressTime[i] >= self.longPressMs:
+                    callback("longpress", x, y, self.pressTime[i] + self.longPressMs)
+            if callback is not None:
+                callback("release", x, y, timestamp)
+
+    # -------------------------------------------------------------------------------------
+    # -- Sends the "longpress" callbacks of buttons that are held for at least
+    # -- <longPressMs> at MIDI time <now>. Called by the input paths whenever all pending
+    # -- input was read; cheap if no button is held.
+    # -------------------------------------------------------------------------------------
+    def Check(self, now):
+        holding = self.holding
+        if not holding or now < self.longDue:
+            return
+        pressTime = self.pressTime
+        longPressMs = self.longPressMs
+        for i in [i for i in holding if now - pressTime[i] >= longPressMs]:
+            holding.discard(i)
+            if self.callback is not None:
+                self.callback("longpress", i % 9, i // 9, pressTime[i] + longPressMs)
+        if holding:
+            self.longDue = min(pressTime[i] for i in holding) + longPressMs
+
+    # -------------------------------------------------------------------------------------
+    # -- Returns True if button <x>/<y> is held down
+    # -------------------------------------------------------------------------------------
+    def IsPressed(self, x, y):
+        return self.pressed[y * 9 + x] != 0
+
+    # -------------------------------------------------------------------------------------
+    # -- Returns for how long (ms) button <x>/<y> is held down at time <now>; 0 if released
+    # -------------------------------------------------------------------------------------
+    def HoldTime(self, x, y, now):
+        i = y * 9 + x
+        if not self.pressed[i]:
+            return 0
+        return now - self.pressTime[i]
+
+    # -------------------------------------------------------------------------------------
+    # -- Returns True if button <x>/<y> is held down for at least <longPressMs> at <now>
+    # -------------------------------------------------------------------------------------
+    def IsLongPress(self, x, y, now):
+        i = y * 9 + x
+        return self.pressed[i] != 0 and now - self.pressTime[i] >= self.longPressMs
+
+    # -------------------------------------------------------------------------------------
+    # -- Returns True if the last press of button <x>/<y> was a double (or triple...) tap
+    # -------------------------------------------------------------------------------------
+    def IsDoubleTap(self, x, y):
+        return self.taps[y * 9 + x] >= 2
+
+    # -------------------------------------------------------------------------------------
+    # -- Returns a copy of the pressed states, 81 bytes in LedFrame order (y * 9 + x)
+    # -------------------------------------------------------------------------------------
+    def Snapshot(self):
+        return bytes(self.pressed)
+
+    # -------------------------------------------------------------------------------------
+    # -- Releases all buttons, e.g. after lost input events
+    # -------------------------------------------------------------------------------------
+    def Clear(self):
+        self.pressed[:] = bytes(81)
+        self.taps[:] = [0] * 81
+        self.holding.clear()
+
 
 ########################################################################################
 # CLASS Launchpad
@@ -374,12 +1388,342 @@ class Launchpad(LaunchpadBase):
     # +---+---+---+---+---+---+---+---+  +---+
     #
 
+    # MIDI message [ <status>, <data1> ] for each LedFrame cell; None for the missing 8/0
+    FRAME_MSG = tuple(
+        None if x == 8 and y == 0 else
+        ((176, 104 + x) if y == 0 else (144, ((y-1) << 4) | x))
+        for y in range(9) for x in range(9))
+
+    # LedFrame cell index for each LED position of LedCtrlRawRapid()
+    RAPID_CELL = tuple(
+        [(y+1) * 9 + x for y in range(8) for x in range(8)] +
+        [(y+1) * 9 + 8 for y in range(8)] +
+        [x for x in range(8)])
+
+    # LedCtrlRawRapid() LED position for each LedFrame cell; None for the missing 8/0
+    CELL_RAPID = tuple(map(dict(zip(RAPID_CELL, range(80))).get, range(81)))
+
+    # Button decoding: ( status << 8 | note ) -> ( <x>, <y>, <raw button number> )
+    BUTTON_DECODE = dict(
+        [((144 << 8) | (y << 4) | x, (x, y + 1, (y << 4) | x)) for y in range(8) for x in range(9)] +
+        [((176 << 8) | (104 + x), (x, 0, 200 + x)) for x in range(8)])
+
+    def __init__(self):
+        super(Launchpad, self).__init__()
+
+        # The frame buffer apps draw into and a copy of what the device (probably) shows.
+        # A cell value of -1 in <frameSent> means "unknown", forcing a resend.
+        self.frame = LedFrame()
+        self.frameSent = [-1] * 81
+        # Hardware double buffering; see FrameDoubleBuffer(). If on, <frameSent> is what
+        # the hidden buffer (the one written to) holds and <frameBack> the visible one.
+        self.doubleBuffer = False
+        self.bufferUpdate = 0
+        self.frameBack = [-1] * 81
+        # held while flushing; for drawing from more than one thread
+        self.frameLock = threading.RLock()
+        # held while drawing into the frame buffer, never during output; see WriterStart()
+        self.drawLock = threading.Lock()
+        # number of flushes sent LED by LED ("led") or via LedCtrlRawRapid() ("rapid")
+        self.flushCount = {"led": 0, "rapid": 0}
+        # next LED position of LedCtrlRawRapid(); None if unknown (not homed yet)
+        self.rapidPos = None
+
+        # ( char, color code, offsx ) -> pixels for LedCtrlChar(); see CharLeds()
+        self.charCache = {}
+
+        # live button states, fed by all button reading methods
+        self.buttons = ButtonMatrix()
+
+        # background writer; see WriterStart()
+        self.writer = None
+        self.writerStop = threading.Event()
+        self.writerWake = threading.Event()
+        self.writerFrame = LedFrame()
+        self.writerPeriod = 1.0 / 60
+        self.writerRapidPos = 0
+        self.writerFlushes = 0
+
+    # -------------------------------------------------------------------------------------
+    # -- Closes this device; stops the background writer first
+    # -------------------------------------------------------------------------------------
+    def Close(self):
+        self.WriterStop()
+        super(Launchpad, self).Close()
+
     # -------------------------------------------------------------------------------------
     # -- reset the Launchpad
     # -- Turns off all LEDs
     # -------------------------------------------------------------------------------------
     def Reset(self):
-        self.midi.RawWrite(176, 0, 0)
+        if self.Deferred():
+            with self.drawLock:
+                self.frame.Clear(0)
+            self.writerWake.set()
+            return
+        with self.frameLock:
+            self.midi.RawWrite(176, 0, 0)
+            self.frameSent[:] = [0] * 81
+            with self.drawLock:
+                self.frame.Clear(0)
+            if self.doubleBuffer:
+                # a reset also ends double buffering
+                self.frameBack[:] = [0] * 81
+                self.bufferUpdate = 0
+                self.FrameSwap()
+
+    # -------------------------------------------------------------------------------------
+    # -- Sets a cell of the frame buffer by its coordinates <x> and <y>, with
+    # -- <red/green> brightness 0..3. Nothing is sent until Flush() is called.
+    # -------------------------------------------------------------------------------------
+    def FrameCtrlXY(self, x, y, red, green):
+        self.frame.SetXY(x, y, self.LedGetColor(red, green))
+
+    # -------------------------------------------------------------------------------------
+    # -- Forgets what the Launchpad shows, so the next Flush() sends the complete frame.
+    # -------------------------------------------------------------------------------------
+    def FrameInvalidate(self):
+        self.frameSent[:] = [-1] * 81
+        self.frameBack[:] = [-1] * 81
+
+    # -------------------------------------------------------------------------------------
+    # -- Turns the Launchpad's double buffering on or off.
+    # -- If on, all LED methods draw into a hidden buffer and Flush() shows a completed
+    # -- frame with a single message, swapping the buffers. After the swap, the hardware
+    # -- copies the shown frame into the new hidden buffer, so the next Flush() only needs
+    # -- to send what changed since, as without double buffering.
+    # -- LEDs set directly (LedCtrlXY(), ...) become visible with the next FrameSwap().
+    # -------------------------------------------------------------------------------------
+    def FrameDoubleBuffer(self, enable=True):
+        with self.frameLock:
+            if enable == self.doubleBuffer:
+                return
+            if enable:
+                # keep showing the current buffer, draw into a copy of it
+                self.doubleBuffer = True
+                self.FrameSwap()
+            else:
+                # show and draw into the buffer that is visible now
+                self.doubleBuffer = False
+                display = 1 - self.bufferUpdate
+                self.midi.RawWrite(176, 0, 32 + 16 + 4 * display + display)
+                self.frameSent[:] = self.frameBack
+                self.bufferUpdate = display
+
+    # -------------------------------------------------------------------------------------
+    # -- Shows the hidden buffer and hides the visible one; only if double buffering is on.
+    # -- The new hidden buffer starts as a copy of the shown one.
+    # -- It's a single message, so it is sent right away, even if the background writer
+    # -- runs; the frame lock keeps it out of the writer's flushes.
+    # -------------------------------------------------------------------------------------
+    def FrameSwap(self):
+        if not self.doubleBuffer:
+            return
+        with self.frameLock:
+            display = self.bufferUpdate
+            self.bufferUpdate = 1 - display
+            # 0 0 1 <copy> <flash> <update> 0 <display>
+            self.midi.RawWrite(176, 0, 32 + 16 + 4 * self.bufferUpdate + display)
+            self.frameBack[:] = self.frameSent
+
+    # -------------------------------------------------------------------------------------
+    # -- Sends all cells of the frame buffer that differ from the last frame sent.
+    # -- Optionally, another LedFrame <frame> can be sent instead of the frame buffer.
+    # -- Returns the number of MIDI messages sent.
+    # -------------------------------------------------------------------------------------
+    def Flush(self, frame=None):
+        if self.Deferred():
+            return self.WriterQueue(frame)
+        frame = self.frame if frame is None else frame
+
+        with self.frameLock:
+            cells = frame.cells
+            sent = self.frameSent
+            changed = [i for i in range(81) if cells[i] != sent[i] and i != 8]
+            return self.FlushCells(changed, frame)
+
+    # -------------------------------------------------------------------------------------
+    # -- Sends the cells <changed> (list of LedFrame cell indices) of the frame buffer or
+    # -- the LedFrame <frame>, in the cheapest way:
+    # --   LED by LED:  one message per changed cell
+    # --   rapid:       one "home" message plus one message per two LEDs, up to the
+    # --                last changed LED in LedCtrlRawRapid() order
+    # -- The path taken is counted in <flushCount>.
+    # -- Returns the number of MIDI messages sent.
+    # -------------------------------------------------------------------------------------
+    def FlushCells(self, changed, frame=None):
+        if not changed:
+            return 0
+        if self.Deferred():
+            return self.WriterQueue(frame)
+        cells = (self.frame if frame is None else frame).cells
+
+        with self.frameLock:
+            cellRapid = self.CELL_RAPID
+            last = max(cellRapid[i] for i in changed)
+            # always an even number of LEDs, otherwise LedCtrlRawRapid() turns one off
+            rapidLeds = min(80, (last + 2) & ~1)
+
+            self.midi.BatchBegin()
+            try:
+                # paced output only coalesces LED by LED messages; see Midi.SetRateLimit()
+                if 1 + rapidLeds // 2 < len(changed) and not self.midi.Paced():
+                    self.flushCount["rapid"] += 1
+                    count = self.FlushRapid(frame, rapidLeds)
+                else:
+                    self.flushCount["led"] += 1
+                    sent = self.frameSent
+                    frameMsg = self.FRAME_MSG
+                    for i in changed:
+                        msg = frameMsg[i]
+                        self.midi.RawWrite(msg[0], msg[1], cells[i])
+                        sent[i] = cells[i]
+                    count = len(changed)
+
+                # double buffering: the frame was drawn into the hidden buffer; show it
+                if self.doubleBuffer:
+                    self.FrameSwap()
+                    count += 1
+            finally:
+                self.midi.BatchEnd()
+
+        return count
+
+    # -------------------------------------------------------------------------------------
+    # -- Sends the first <count> LEDs (in LedCtrlRawRapid() order) of the frame buffer
+    # -- with LedCtrlRawRapid(); the complete frame takes 41 messages.
+    # -- Returns the number of MIDI messages sent.
+    # -------------------------------------------------------------------------------------
+    def FlushRapid(self, frame=None, count=80):
+        if self.Deferred():
+            return self.WriterQueue(frame)
+        cells = (self.frame if frame is None else frame).cells
+
+        with self.frameLock:
+            self.midi.BatchBegin()
+            try:
+                self.LedCtrlRawRapidHome()
+                self.LedCtrlRawRapid([cells[i] for i in self.RAPID_CELL[:count]])
+            finally:
+                self.midi.BatchEnd()
+
+        return 1 + (count + 1) // 2
+
+    # -------------------------------------------------------------------------------------
+    # -- Starts the background writer: from now on, all LED methods only draw into the frame
+    # -- buffer and return immediately; the writer thread sends the changes, at most <fps>
+    # -- times per second. So the calling threads never wait for MIDI output.
+    # -------------------------------------------------------------------------------------
+    def WriterStart(self, fps=60):
+        self.writerPeriod = 1.0 / fps
+        if self.writer is not None:
+            return
+        # the frame buffer already holds what the LED methods drew; continue from there
+        self.writerRapidPos = 0
+        self.writerStop.clear()
+        self.writer = threading.Thread(target=self.WriterLoop, name="LaunchpadWriter")
+        self.writer.daemon = True
+        self.writer.start()
+
+    # -------------------------------------------------------------------------------------
+    # -- Stops the background writer, after sending all pending changes
+    # -------------------------------------------------------------------------------------
+    def WriterStop(self):
+        writer = self.writer
+        if writer is None:
+            return
+        self.writerStop.set()
+        self.writerWake.set()
+        if writer is not threading.current_thread():
+            writer.join()
+        self.writer = None
+
+    # -------------------------------------------------------------------------------------
+    # -- True if LED output is deferred to the background writer, i.e. if it is running
+    # -- and this is not the writer thread itself.
+    # -------------------------------------------------------------------------------------
+    def Deferred(self):
+        writer = self.writer
+        return writer is not None and writer is not threading.current_thread()
+
+    # -------------------------------------------------------------------------------------
+    # -- Lets the writer send the frame buffer (or a copy of LedFrame <frame>); returns 0,
+    # -- the number of messages sent right now.
+    # -------------------------------------------------------------------------------------
+    def WriterQueue(self, frame=None):
+        if frame is not None and frame is not self.frame:
+            with self.drawLock:
+                self.frame.CopyFrom(frame)
+        self.writerWake.set()
+        return 0
+
+    # -------------------------------------------------------------------------------------
+    # -- The writer thread; sends a snapshot of the frame buffer whenever something was
+    # -- drawn, but not more often than once per period.
+    # -------------------------------------------------------------------------------------
+    def WriterLoop(self):
+        snapshot = self.writerFrame
+        while True:
+            self.writerWake.wait()
+            self.writerWake.clear()
+            start = monotonic()
+
+            with self.drawLock:
+                snapshot.CopyFrom(self.frame)
+            self.Flush(snapshot)
+            self.writerFlushes += 1
+
+            if self.writerStop.is_set():
+                break
+            self.writerStop.wait(max(0, self.writerPeriod - (monotonic() - start)))
+
+    # -------------------------------------------------------------------------------------
+    # -- Array version of LedGetColor(); requires numpy.
+    # -- Returns an integer array of color codes, shaped like <red> and <green>.
+    # -------------------------------------------------------------------------------------
+    def LedGetColorArray(self, red, green):
+        numpy = Numpy()
+        # astype() truncates, just like int() in LedGetColor()
+        red = numpy.clip(numpy.asarray(red).astype(numpy.int64), 0, 3)
+        green = numpy.clip(numpy.asarray(green).astype(numpy.int64), 0, 3)
+        return red | (green << 4)
+
+    # -------------------------------------------------------------------------------------
+    # -- Sets the frame buffer from a numpy array (or anything numpy can convert) and sends
+    # -- the LEDs that changed; requires numpy.
+    # -- Arrays are indexed [y][x]. A (9, 9) array covers the whole X/Y grid,
+    # -- a (8, 8) array just the main matrix (the top row and right column stay as they are).
+    # -- With <red> and <green> intensities (0..3, clamped), or packed color codes in <red>
+    # -- only (0..127, see LedGetColor(); anything else raises ValueError).
+    # -- The changes are sent one by one or, if that's cheaper, via LedCtrlRawRapid();
+    # -- see FlushCells().
+    # -- Returns the number of MIDI messages sent.
+    # -------------------------------------------------------------------------------------
+    def LedCtrlArray(self, red, green=None):
+        numpy = Numpy()
+        if green is None:
+            codes = numpy.asarray(red).astype(numpy.int64)
+            # the codes go out as MIDI data bytes
+            if codes.size and (codes.min() < 0 or codes.max() > 0x7f):
+                raise ValueError("color codes must be 0..127")
+        else:
+            codes = self.LedGetColorArray(red, green)
+
+        if codes.shape == (9, 9):
+            grid = codes
+        elif codes.shape == (8, 8):
+            grid = numpy.array(self.frame.cells, dtype=numpy.int64).reshape(9, 9)
+            grid[1:, :8] = codes
+        else:
+            raise ValueError("array shape must be (9, 9) or (8, 8), not %s" % (codes.shape,))
+
+        with self.frameLock:
+            cells = grid.ravel()
+            changed = numpy.flatnonzero(cells != numpy.array(self.frameSent, dtype=numpy.int64))
+            # cell 8/0 does not exist
+            changed = changed[changed != 8]
+            self.frame.cells[:] = cells.tolist()
+            return self.FlushCells(changed.tolist())
 
     # -------------------------------------------------------------------------------------
     # -- Returns a Launchpad compatible "color code byte"
@@ -414,7 +1758,17 @@ class Launchpad(LaunchpadBase):
                 return
             # 0-120
             led = self.LedGetColor(red, green)
-            self.midi.RawWrite(144, number, led)
+            if self.Deferred():
+                if number & 0x0f < 9:
+                    self.frame.cells[((number >> 4) + 1) * 9 + (number & 0x0f)] = led
+                    self.writerWake.set()
+                return
+            with self.frameLock:
+                self.midi.RawWrite(144, number, led)
+                if number & 0x0f < 9:
+                    cell = ((number >> 4) + 1) * 9 + (number & 0x0f)
+                    self.frameSent[cell] = led
+                    self.frame.cells[cell] = led
 
     # -------------------------------------------------------------------------------------
     # -- Controls a grid LED by its coordinates <x> and <y>  with <green/red> brightness 0..3
@@ -446,9 +1800,40 @@ class Launchpad(LaunchpadBase):
     def LedCtrlRawRapid(self, allLeds):
         le = len(allLeds)
 
-        for i in range(0, le, 2):
-            self.midi.RawWrite(
-                146, allLeds[i], allLeds[i+1] if i+1 < le else 0)
+        if self.Deferred():
+            pos = self.writerRapidPos
+            rapidCell = self.RAPID_CELL
+            with self.drawLock:
+                cells = self.frame.cells
+                for i in range(le + (le & 1)):
+                    cells[rapidCell[(pos + i) % 80]] = allLeds[i] if i < le else 0
+            self.writerRapidPos = (pos + le + (le & 1)) % 80
+            self.writerWake.set()
+            return
+
+        with self.frameLock:
+            # The timestamp-free, batched version of the "fast version" below.
+            self.midi.BatchBegin()
+            try:
+                for i in range(0, le, 2):
+                    self.midi.RawWrite(
+                        146, allLeds[i], allLeds[i+1] if i+1 < le else 0)
+            finally:
+                self.midi.BatchEnd()
+
+            # keep track of what the device shows
+            pos = self.rapidPos
+            if pos is None:
+                self.FrameInvalidate()
+                return
+            sent = self.frameSent
+            rapidCell = self.RAPID_CELL
+            with self.drawLock:
+                cells = self.frame.cells
+                for i in range(le + (le & 1)):
+                    cell = rapidCell[(pos + i) % 80]
+                    sent[cell] = cells[cell] = allLeds[i] if i < le else 0
+            self.rapidPos = (pos + le + (le & 1)) % 80
 
 #   This fast version does not work, because the Launchpad gets confused
 #   by the timestamps...
@@ -471,7 +1856,12 @@ class Launchpad(LaunchpadBase):
     # -- "Homes" the next LedCtrlRawRapid() call, so it will start with the first LED again.
     # -------------------------------------------------------------------------------------
     def LedCtrlRawRapidHome(self):
-        self.midi.RawWrite(176, 1, 0)
+        if self.Deferred():
+            self.writerRapidPos = 0
+            return
+        with self.frameLock:
+            self.midi.RawWrite(176, 1, 0)
+            self.rapidPos = 0
 
     # -------------------------------------------------------------------------------------
     # -- Controls an automap LED <number>; with <green/red> brightness: 0..3
@@ -488,7 +1878,14 @@ class Launchpad(LaunchpadBase):
         green = min(3, green)
         led = self.LedGetColor(red, green)
 
-        self.midi.RawWrite(176, 104 + number, led)
+        if self.Deferred():
+            self.frame.cells[number] = led
+            self.writerWake.set()
+            return
+        with self.frameLock:
+            self.midi.RawWrite(176, 104 + number, led)
+            self.frameSent[number] = led
+            self.frame.cells[number] = led
 
     # -------------------------------------------------------------------------------------
     # -- all LEDs on
@@ -499,29 +1896,80 @@ class Launchpad(LaunchpadBase):
     def LedAllOn(self, colorcode=None):
         if colorcode == 0:
             self.Reset()
+        elif self.Deferred():
+            with self.drawLock:
+                self.frame.Clear(0x33)
+                self.frame.cells[8] = 0
+            self.writerWake.set()
         else:
-            self.midi.RawWrite(176, 0, 127)
+            with self.frameLock:
+                self.midi.RawWrite(176, 0, 127)
+                self.FrameInvalidate()
+                with self.drawLock:
+                    self.frame.Clear(0x33)
+                    self.frame.cells[8] = 0
+                if self.doubleBuffer:
+                    # like a reset, this ends double buffering
+                    self.bufferUpdate = 0
+                    self.FrameSwap()
 
     # -------------------------------------------------------------------------------------
     # -- Sends character <char> in colors <red/green> and lateral offset <offsx> (-8..8)
     # -- to the Launchpad. <offsy> does not have yet any function
+    # -- Only LEDs that are not already showing the right color are sent.
     # -------------------------------------------------------------------------------------
     def LedCtrlChar(self, char, red, green, offsx=0, offsy=0):
         char = ord(char)
 
         if char < 0 or char > 255:
             return
-        char *= 8
 
-        for i in range(0, 8*16, 16):
+        code = self.LedGetColor(red, green)
+        key = (char, code, offsx)
+        leds = self.charCache.get(key)
+        if leds is None:
+            if len(self.charCache) >= 4096:
+                self.charCache.clear()
+            leds = self.CharLeds(char, code, offsx)
+            self.charCache[key] = leds
+
+        if self.Deferred():
+            with self.drawLock:
+                cells = self.frame.cells
+                for lednum, cell, led in leds:
+                    cells[cell] = led
+            self.writerWake.set()
+            return
+
+        with self.frameLock:
+            sent = self.frameSent
+            self.midi.BatchBegin()
+            try:
+                for lednum, cell, led in leds:
+                    if sent[cell] != led:
+                        self.midi.RawWrite(144, lednum, led)
+                        sent[cell] = led
+            finally:
+                self.midi.BatchEnd()
+            with self.drawLock:
+                cells = self.frame.cells
+                for lednum, cell, led in leds:
+                    cells[cell] = led
+
+    # -------------------------------------------------------------------------------------
+    # -- Returns the pixels of character number <char>, in color code <code> and shifted
+    # -- by <offsx>, as a tuple of ( <LED number>, <LedFrame cell>, <color code> ).
+    # -- Pixels shifted out of the 8x8 matrix are omitted, not turned off.
+    # -------------------------------------------------------------------------------------
+    def CharLeds(self, char, code, offsx):
+        bitmap = GlyphBitmap(char)
+        leds = []
+        for y in range(8):
             for j in range(8):
-                lednum = i + j + offsx
-                if lednum >= i and lednum < i + 8:
-                    if CHARTAB[char] & 0x80 >> j:
-                        self.LedCtrlRaw(lednum, red, green)
-                    else:
-                        self.LedCtrlRaw(lednum, 0, 0)
-            char += 1
+                x = j + offsx
+                if 0 <= x < 8:
+                    leds.append(((y << 4) | x, (y+1) * 9 + x, code if bitmap[y*8 + j] else 0))
+        return tuple(leds)
 
     # -------------------------------------------------------------------------------------
     # -- Scroll <text>, in colors specified by <red/green>, as fast as we can.
@@ -538,13 +1986,18 @@ class Launchpad(LaunchpadBase):
         if direction == self.SCROLL_LEFT:
             text += " "
             for n in range((len(text) + 1) * 8):
-                if n <= len(text)*8:
-                    self.LedCtrlChar(
-                        text[limit((n // 16)*2, 0, len(text)-1)], red, green, 8 - n % 16)
-                if n > 7:
-                    self.LedCtrlChar(
-                        text[limit((((n-8)//16)*2) + 1, 0, len(text)-1)], red, green, 8-(n-8) % 16)
-                time.wait(waitms)
+                # both halves of the screen in one batch
+                self.midi.BatchBegin()
+                try:
+                    if n <= len(text)*8:
+                        self.LedCtrlChar(
+                            text[limit((n // 16)*2, 0, len(text)-1)], red, green, 8 - n % 16)
+                    if n > 7:
+                        self.LedCtrlChar(
+                            text[limit((((n-8)//16)*2) + 1, 0, len(text)-1)], red, green, 8-(n-8) % 16)
+                finally:
+                    self.midi.BatchEnd()
+                self.midi.Wait(waitms)
         elif direction == self.SCROLL_RIGHT:
             # TODO: Just a quick hack (screen is erased before scrolling begins).
             #       Characters at odd positions from the right (1, 3, 5), with pixels at the left,
@@ -552,23 +2005,40 @@ class Launchpad(LaunchpadBase):
             text = " " + text + " "  # just to avoid artifacts on full width characters
 #			for n in range( (len(text) + 1) * 8 - 1, 0, -1 ):
             for n in range((len(text) + 1) * 8 - 7, 0, -1):
-                if n <= len(text)*8:
-                    self.LedCtrlChar(
-                        text[limit((n // 16)*2, 0, len(text)-1)], red, green, 8 - n % 16)
-                if n > 7:
-                    self.LedCtrlChar(
-                        text[limit((((n-8)//16)*2) + 1, 0, len(text)-1)], red, green, 8-(n-8) % 16)
-                time.wait(waitms)
+                # both halves of the screen in one batch
+                self.midi.BatchBegin()
+                try:
+                    if n <= len(text)*8:
+                        self.LedCtrlChar(
+                            text[limit((n // 16)*2, 0, len(text)-1)], red, green, 8 - n % 16)
+                    if n > 7:
+                        self.LedCtrlChar(
+                            text[limit((((n-8)//16)*2) + 1, 0, len(text)-1)], red, green, 8-(n-8) % 16)
+                finally:
+                    self.midi.BatchEnd()
+                self.midi.Wait(waitms)
         else:
             for i in text:
                 for n in range(4):  # pseudo repetitions to compensate the timing a bit
                     self.LedCtrlChar(i, red, green)
-                    time.wait(waitms)
+                    self.midi.Wait(waitms)
+
+    # -------------------------------------------------------------------------------------
+    # -- Scrolls <text> in the background, via the frame buffer, with <fps> steps per second.
+    # -- <direction> as in LedCtrlString(); if <repeat> is True, the text loops forever.
+    # -- Returns the running TextScroll object, which can be used to stop or change it.
+    # -------------------------------------------------------------------------------------
+    def LedCtrlStringStart(self, text, red, green, direction=-1, fps=10, repeat=False):
+        scroll = TextScroll(self, text, red, green, direction, fps, repeat)
+        scroll.Start()
+        return scroll
 
     # -------------------------------------------------------------------------------------
     # -- Returns True if a button event was received.
     # -------------------------------------------------------------------------------------
     def ButtonChanged(self):
+        if self.reader is not None:
+            return len(self.readerEvents) > 0
         return self.midi.ReadCheck()
 
     # -------------------------------------------------------------------------------------
@@ -576,27 +2046,311 @@ class Launchpad(LaunchpadBase):
     # -- [ <button>, <True/False> ]
     # -------------------------------------------------------------------------------------
     def ButtonStateRaw(self):
-        if self.midi.ReadCheck():
-            a = self.midi.ReadRaw()
-            return [a[0][0][1] if a[0][0][0] == 144 else a[0][0][1] + 96, True if a[0][0][2] > 0 else False]
+        if self.reader is not None:
+            ev = self.ReaderPop()
+            if ev is None:
+                return []
+            return [200 + ev[0] if ev[1] == 0 else ((ev[1]-1) << 4) | ev[0], ev[2]]
+
+        a = self.midi.ReadRaw() if self.midi.ReadCheck() else []
+        if a:
+            data = a[0][0]
+            btn = self.BUTTON_DECODE.get((data[0] << 8) | data[1])
+            if btn is not None:
+                self.buttons.Update(btn[0], btn[1], data[2] > 0, a[0][1])
+                return [btn[2], data[2] > 0]
         else:
-            return []
+            self.ButtonCheck()
+        return []
 
     # -------------------------------------------------------------------------------------
     # -- Returns an x/y value of the last button change as a list:
     # -- [ <x>, <y>, <True/False> ]
     # -------------------------------------------------------------------------------------
     def ButtonStateXY(self):
-        if self.midi.ReadCheck():
-            a = self.midi.ReadRaw()
+        if self.reader is not None:
+            ev = self.ReaderPop()
+            if ev is None:
+                return []
+            return [ev[0], ev[1], ev[2]]
+
+        a = self.midi.ReadRaw() if self.midi.ReadCheck() else []
+        if a:
+            data = a[0][0]
+            btn = self.BUTTON_DECODE.get((data[0] << 8) | data[1])
+            if btn is not None:
+                self.buttons.Update(btn[0], btn[1], data[2] > 0, a[0][1])
+                return [btn[0], btn[1], data[2] > 0]
+        else:
+            self.ButtonCheck()
+        return []
 
-            if a[0][0][0] == 144:
-                x = a[0][0][1] & 0x0f
-                y = (a[0][0][1] & 0xf0) >> 4
+    # -------------------------------------------------------------------------------------
+    # -- Reads up to <events>.size button events into the ButtonEvents buffer <events>,
+    # -- in one bulk read. Returns the number of events (also in <events>.count).
+    # -- Other MIDI messages are skipped. Works with or without the background reader.
+    # -------------------------------------------------------------------------------------
+    def ButtonStateBatch(self, events):
+        if self.reader is not None:
+            queue = self.readerEvents
+            n = 0
+            while n < events.size and queue:
+                x, y, pressed, timestamp = queue.popleft()
+                events.x[n] = x
+                events.y[n] = y
+                events.pressed[n] = pressed
+                events.timestamp[n] = timestamp
+                n += 1
+            events.count = n
+            return n
+
+        if not self.midi.ReadCheck():
+            self.ButtonCheck()
+            events.count = 0
+            return 0
+        return self.ButtonDecode(self.midi.ReadRaw(events.size), events)
 
-                return [x, y+1, True if a[0][0][2] > 0 else False]
+    # -------------------------------------------------------------------------------------
+    # -- Decodes raw MIDI events, as returned by EventRaw(), into the ButtonEvents buffer
+    # -- <events>; returns the number of button events. Also updates <buttons>.
+    # -------------------------------------------------------------------------------------
+    def ButtonDecode(self, raw, events):
+        decode = self.BUTTON_DECODE.get
+        update = self.buttons.Update
+        xs, ys, pressed, timestamps = events.x, events.y, events.pressed, events.timestamp
+        n = 0
+        for data, timestamp in raw:
+            btn = decode((data[0] << 8) | data[1])
+            if btn is None or n >= events.size:
+                continue
+            xs[n] = btn[0]
+            ys[n] = btn[1]
+            pressed[n] = data[2] > 0
+            timestamps[n] = timestamp
+            update(btn[0], btn[1], data[2] > 0, timestamp)
+            n += 1
+        events.count = n
+        return n
 
-            elif a[0][0][0] == 176:
-                return [a[0][0][1] - 104, 0, True if a[0][0][2] > 0 else False]
+    # -------------------------------------------------------------------------------------
+    # -- Decodes a button message for the background reader into an event record:
+    # -- ( <x>, <y>, <True/False>, <timestamp> )
+    # -------------------------------------------------------------------------------------
+    def EventDecode(self, data, timestamp):
+        btn = self.BUTTON_DECODE.get((data[0] << 8) | data[1])
+        if btn is None:
+            return None
+        self.buttons.Update(btn[0], btn[1], data[2] > 0, timestamp)
+        return (btn[0], btn[1], data[2] > 0, timestamp)
 
-        return []
+    # -------------------------------------------------------------------------------------
+    # -- Sends due "longpress" callbacks; see ButtonMatrix.Check()
+    # -------------------------------------------------------------------------------------
+    def ButtonCheck(self):
+        if self.buttons.holding:
+            self.buttons.Check(self.midi.GetTime())
+
+    # -------------------------------------------------------------------------------------
+    # -- Returns True if button <x>/<y> is held down right now (see <buttons>).
+    # -- Only up to date if the buttons are read, by any method or the background reader.
+    # -------------------------------------------------------------------------------------
+    def ButtonPressedXY(self, x, y):
+        return self.buttons.IsPressed(x, y)
+
+    # -------------------------------------------------------------------------------------
+    # -- Returns for how long (ms) button <x>/<y> is held down; 0 if it is not
+    # -------------------------------------------------------------------------------------
+    def ButtonHoldXY(self, x, y):
+        return self.buttons.HoldTime(x, y, self.midi.GetTime())
+
+
+########################################################################################
+# CLASS FixedRateThread
+###
+# A fixed rate scheduler on the monotonic clock, running Step() <fps> times per
+# second in a background thread named <name>. Steps that are too late are skipped
+# (and counted in <dropped>), not queued; see Skip().
+# Base class of TextScroll and effects.EffectsEngine.
+########################################################################################
+class FixedRateThread(object):
+
+    def __init__(self, fps, name):
+        self.period = 1.0 / fps
+        self.name = name
+        self.dropped = 0
+        self.thread = None
+        self.stop = threading.Event()
+
+    # -------------------------------------------------------------------------------------
+    # -- Runs one step at monotonic time <now>, <late> seconds after it was due.
+    # -- Returns False to end the thread.
+    # -------------------------------------------------------------------------------------
+    def Step(self, now, late):
+        raise NotImplementedError
+
+    # -------------------------------------------------------------------------------------
+    # -- Called with the number of steps that were skipped because the thread was late
+    # -------------------------------------------------------------------------------------
+    def Skip(self, count):
+        pass
+
+    # -------------------------------------------------------------------------------------
+    # -- Changes the rate
+    # -------------------------------------------------------------------------------------
+    def SetRate(self, fps):
+        self.period = 1.0 / fps
+
+    # -------------------------------------------------------------------------------------
+    # -- Starts the background thread
+    # -------------------------------------------------------------------------------------
+    def Start(self):
+        if self.thread is not None:
+            return
+        self.stop.clear()
+        self.thread = threading.Thread(target=self.Loop, name=self.name)
+        self.thread.daemon = True
+        self.thread.start()
+
+    # -------------------------------------------------------------------------------------
+    # -- Stops the background thread
+    # -------------------------------------------------------------------------------------
+    def Stop(self):
+        self.stop.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+        self.thread = None
+
+    # -------------------------------------------------------------------------------------
+    # -- Waits up to <timeout> seconds for the thread to end; True if it did.
+    # -------------------------------------------------------------------------------------
+    def Wait(self, timeout=None):
+        thread = self.thread
+        if thread is not None:
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+
+    # -------------------------------------------------------------------------------------
+    # -- True while the thread runs
+    # -------------------------------------------------------------------------------------
+    def IsRunning(self):
+        thread = self.thread
+        return thread is not None and thread.is_alive()
+
+    # -------------------------------------------------------------------------------------
+    # -- The thread
+    # -------------------------------------------------------------------------------------
+    def Loop(self):
+        due = monotonic()
+
+        while not self.stop.is_set():
+            now = monotonic()
+            if not self.Step(now, max(0.0, now - due)):
+                break
+
+            due += self.period
+            now = monotonic()
+            if now > due:
+                # too late; skip steps instead of trying to catch up
+                late = int((now - due) / self.period)
+                self.dropped += late
+                self.Skip(late)
+                due += late * self.period
+            self.stop.wait(max(0, due - now))
+
+
+########################################################################################
+# CLASS TextScroll
+###
+# Non-blocking text scrolling for the Launchpad's 8x8 matrix; see LedCtrlStringStart().
+# The text is rendered once into a strip of 8 pixel high columns, each step only
+# copies an 8 columns wide window of it into the frame buffer and flushes it.
+# Frames that are too late are skipped (and counted in <dropped>), not queued.
+########################################################################################
+class TextScroll(FixedRateThread):
+
+    def __init__(self, lp, text, red, green, direction=-1, fps=10, repeat=False):
+        FixedRateThread.__init__(self, fps, "LaunchpadScroll")
+        self.lp = lp
+        self.repeat = repeat
+        self.frames = 0
+        self.SetText(text, red, green, direction)
+
+    # -------------------------------------------------------------------------------------
+    # -- Renders <text> into a strip of column bitmaps (bit n is row n), with an empty
+    # -- screen before and after the text.
+    # -------------------------------------------------------------------------------------
+    @staticmethod
+    def RenderStrip(text):
+        strip = bytearray(8)
+        for c in text:
+            bitmap = GlyphBitmap(ord(c) & 0xff)
+            for x in range(8):
+                col = 0
+                for y in range(8):
+                    if bitmap[y*8 + x]:
+                        col |= 1 << y
+                strip.append(col)
+        strip.extend(bytes(8))
+        return bytes(strip)
+
+    # -------------------------------------------------------------------------------------
+    # -- Changes the text (and optionally color and direction) of a scroll; running
+    # -- scrolls start over with the new text.
+    # -------------------------------------------------------------------------------------
+    def SetText(self, text, red=None, green=None, direction=None):
+        if red is not None or green is not None:
+            self.code = self.lp.LedGetColor(red or 0, green or 0)
+        if direction is not None:
+            self.direction = direction
+
+        strip = self.RenderStrip(text)
+        if self.direction == 0:
+            # one character after the other
+            steps = [8 + 8*i for i in range(len(text)) for n in range(4)]
+        else:
+            steps = list(range(len(strip) - 7))
+            if self.direction > 0:
+                steps.reverse()
+        # replaced in one go; the scroll thread might be running
+        self.script = (strip, steps)
+        self.step = 0
+
+    # -------------------------------------------------------------------------------------
+    # -- Changes the speed
+    # -------------------------------------------------------------------------------------
+    def SetSpeed(self, fps):
+        self.SetRate(fps)
+
+    # -------------------------------------------------------------------------------------
+    # -- Draws one window of the strip, starting at column <start>, into the frame buffer.
+    # -------------------------------------------------------------------------------------
+    def Draw(self, strip, start):
+        cells = self.lp.frame.cells
+        code = self.code
+        for x in range(8):
+            col = strip[start + x]
+            for y in range(8):
+                cells[(y+1) * 9 + x] = code if col & (1 << y) else 0
+
+    # -------------------------------------------------------------------------------------
+    # -- One step of the scroll thread
+    # -------------------------------------------------------------------------------------
+    def Step(self, now, late):
+        lp = self.lp
+        strip, steps = self.script
+        if self.step >= len(steps):
+            if not self.repeat:
+                return False
+            self.step = 0
+
+        with lp.frameLock:
+            with lp.drawLock:
+                self.Draw(strip, steps[self.step])
+            lp.Flush()
+        self.frames += 1
+        self.step += 1
+        return True
+
+    def Skip(self, count):
+        self.step += count
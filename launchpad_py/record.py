@@ -0,0 +1,285 @@
+#
+# Binary recording and replay of MIDI sessions; see Midi.RecordStart().
+#
+# While recording, the Midi object's ports are wrapped by RecordOutput and
+# RecordInput, which append every message that goes out or comes in to a log
+# file. The log is a short header followed by fixed size records:
+#
+#   offset  size
+#        0     4  MIDI time (ms, Midi.GetTime()) of the write or read
+#        4     1  kind: KIND_OUT, KIND_IN, KIND_SYSEX or KIND_SYSEX_END
+#        5     1  number of valid data bytes
+#        6    10  data:
+#                   KIND_OUT        the message, up to 4 bytes
+#                   KIND_IN         the message (4 bytes) and its PortMidi timestamp (4 bytes)
+#                   KIND_SYSEX      10 bytes of a SysEx message, more follow
+#                   KIND_SYSEX_END  the last (up to) 10 bytes of a SysEx message
+#
+# The Replayer memory-maps such a log and sends it again, e.g. to a virtual
+# Launchpad (see virtual.py), in real time or as fast as possible:
+#
+#   rep = Replayer( "show.lprec" )
+#   vlp = VirtualLaunchpad()
+#   Midi.SetBackend( VirtualBackend( [ vlp ] ) )
+#   midi = Midi()
+#   midi.OpenOutput( 1 )
+#   rep.Replay( midi, vlp, realtime = False )
+#
+
+import mmap
+import struct
+import threading
+
+
+MAGIC = b"LPREC\x00\x01\x00"
+RECORD = struct.Struct("<IBB10s")
+
+KIND_OUT = 1
+KIND_IN = 2
+KIND_SYSEX = 3
+KIND_SYSEX_END = 4
+
+
+########################################################################################
+# CLASS Recorder
+###
+# Appends records to the log file <path> (or an open binary file); thread safe.
+# <clock> returns the MIDI time in ms.
+########################################################################################
+class Recorder(object):
+
+    def __init__(self, path, clock):
+        if hasattr(path, "write"):
+            self.file = path
+            self.ownFile = False
+        else:
+            self.file = open(path, "ab")
+            self.ownFile = True
+        if self.file.tell() == 0:
+            self.file.write(MAGIC)
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.records = 0
+
+    # -------------------------------------------------------------------------------------
+    # -- Records a list of short messages, as passed to a port's write()
+    # -------------------------------------------------------------------------------------
+    def Output(self, lstMessages):
+        now = self.clock() & 0xffffffff
+        pack = RECORD.pack
+        data = b"".join([pack(now, KIND_OUT, min(4, len(msg)), bytes(msg[:4])) for msg, timestamp in lstMessages])
+        with self.lock:
+            self.file.write(data)
+            self.records += len(lstMessages)
+
+    # -------------------------------------------------------------------------------------
+    # -- Records a single short message
+    # -------------------------------------------------------------------------------------
+    def OutputShort(self, stat, dat1, dat2):
+        data = RECORD.pack(self.clock() & 0xffffffff, KIND_OUT, 3, bytes((stat, dat1, dat2)))
+        with self.lock:
+            self.file.write(data)
+            self.records += 1
+
+    # -------------------------------------------------------------------------------------
+    # -- Records a SysEx message <msg> (bytes, including 0xF0 and 0xF7)
+    # -------------------------------------------------------------------------------------
+    def OutputSysEx(self, msg):
+        now = self.clock() & 0xffffffff
+        msg = bytes(msg)
+        pack = RECORD.pack
+        chunks = [msg[i:i+10] for i in range(0, len(msg), 10)] or [b""]
+        data = b"".join([
+            pack(now, KIND_SYSEX if i < len(chunks) - 1 else KIND_SYSEX_END, len(chunk), chunk)
+            for i, chunk in enumerate(chunks)])
+        with self.lock:
+            self.file.write(data)
+            self.records += len(chunks)
+
+    # -------------------------------------------------------------------------------------
+    # -- Records input <events>, as returned by a port's read()
+    # -------------------------------------------------------------------------------------
+    def Input(self, events):
+        if not events:
+            return
+        now = self.clock() & 0xffffffff
+        pack = RECORD.pack
+        data = b"".join([
+            pack(now, KIND_IN, 8, bytes((msg + [0, 0, 0, 0])[:4]) + struct.pack("<I", timestamp & 0xffffffff))
+            for msg, timestamp in events])
+        with self.lock:
+            self.file.write(data)
+            self.records += len(events)
+
+    # -------------------------------------------------------------------------------------
+    # -- Writes everything to the file
+    # -------------------------------------------------------------------------------------
+    def Flush(self):
+        with self.lock:
+            self.file.flush()
+
+    # -------------------------------------------------------------------------------------
+    # -- Ends the recording; closes the file if it was opened here
+    # -------------------------------------------------------------------------------------
+    def Close(self):
+        with self.lock:
+            self.file.flush()
+            if self.ownFile:
+                self.file.close()
+
+
+########################################################################################
+# CLASS RecordOutput, RecordInput
+###
+# Port wrappers; <port> is the original port object
+########################################################################################
+class RecordOutput(object):
+
+    def __init__(self, port, recorder):
+        self.port = port
+        self.recorder = recorder
+
+    def write_short(self, stat, dat1=0, dat2=0):
+        self.recorder.OutputShort(stat, dat1, dat2)
+        self.port.write_short(stat, dat1, dat2)
+
+    def write(self, lstMessages):
+        self.recorder.Output(lstMessages)
+        self.port.write(lstMessages)
+
+    def write_sys_ex(self, timestamp, msg):
+        self.recorder.OutputSysEx(msg)
+        self.port.write_sys_ex(timestamp, msg)
+
+    def close(self):
+        self.port.close()
+
+
+class RecordInput(object):
+
+    def __init__(self, port, recorder):
+        self.port = port
+        self.recorder = recorder
+
+    def poll(self):
+        return self.port.poll()
+
+    def read(self, count):
+        events = self.port.read(count)
+        self.recorder.Input(events)
+        return events
+
+    def close(self):
+        self.port.close()
+
+
+########################################################################################
+# CLASS Replayer
+###
+# Reads a log written by a Recorder, via mmap; nothing is loaded into memory.
+# An incomplete last record (e.g. after a crash) is ignored.
+########################################################################################
+class Replayer(object):
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:len(MAGIC)] != MAGIC:
+            self.Close()
+            raise ValueError("not a Launchpad MIDI log: %s" % (path,))
+        self.count = (len(self.map) - len(MAGIC)) // RECORD.size
+
+    # -------------------------------------------------------------------------------------
+    # -- Returns an iterator over the raw records, ( <time>, <kind>, <length>, <data> ).
+    # -- Records are unpacked straight from the map, one by one; no view of it is kept,
+    # -- so Close() works even if the iteration was not finished.
+    # -------------------------------------------------------------------------------------
+    def Records(self):
+        unpack = RECORD.unpack_from
+        mapped = self.map
+        start = len(MAGIC)
+        for offset in range(start, start + self.count * RECORD.size, RECORD.size):
+            yield unpack(mapped, offset)
+
+    # -------------------------------------------------------------------------------------
+    # -- Returns an iterator over the messages, ( <time>, <kind>, <data> ), with
+    # -- <kind> KIND_OUT, KIND_IN or KIND_SYSEX (complete, including 0xF0 and 0xF7).
+    # -- For KIND_IN, <data> is ( [ stat, dat1, dat2, dat3 ], <timestamp> ).
+    # -------------------------------------------------------------------------------------
+    def Messages(self):
+        sysex = []
+        for time, kind, length, data in self.Records():
+            if kind == KIND_OUT:
+                yield time, kind, data[:length]
+            elif kind == KIND_IN:
+                yield time, kind, (list(data[:4]), struct.unpack_from("<I", data, 4)[0])
+            elif kind == KIND_SYSEX:
+                sysex.append(data[:length])
+            elif kind == KIND_SYSEX_END:
+                sysex.append(data[:length])
+                yield time, KIND_SYSEX, b"".join(sysex)
+                sysex = []
+
+    # -------------------------------------------------------------------------------------
+    # -- Replays the log: output goes to the Midi object <midi> (opened output port),
+    # -- input is queued at the VirtualLaunchpad <device>; both are optional.
+    # -- With <realtime>, the original timing is kept (scaled by 1 / <speed>), otherwise
+    # -- everything is sent as fast as possible. Consecutive short messages with the
+    # -- same time are sent in one write.
+    # -- Returns ( <output messages>, <input events> ).
+    # -------------------------------------------------------------------------------------
+    def Replay(self, midi=None, device=None, realtime=False, speed=1.0):
+        from time import sleep, monotonic
+
+        outCount = 0
+        inCount = 0
+        batch = []
+        batchTime = None
+        start = None
+        t0 = None
+
+        def send(msgs):
+            if midi is not None and msgs:
+                midi.RawWriteMulti(msgs)
+
+        for time, kind, data in self.Messages():
+            if realtime:
+                if t0 is None:
+                    t0 = time
+                    start = monotonic()
+                due = start + (time - t0) / 1000.0 / speed
+                wait = due - monotonic()
+                if wait > 0:
+                    send(batch)
+                    batch = []
+                    sleep(wait)
+
+            if kind == KIND_OUT:
+                if batchTime != time:
+                    send(batch)
+                    batch = []
+                    batchTime = time
+                batch.append([list(data), 0])
+                outCount += 1
+                continue
+
+            send(batch)
+            batch = []
+            if kind == KIND_SYSEX:
+                if midi is not None:
+                    midi.RawWriteSysEx(data[1:-1])
+                outCount += 1
+            elif kind == KIND_IN:
+                if device is not None:
+                    device.Inject(data[0])
+                inCount += 1
+
+        send(batch)
+        return outCount, inCount
+
+    # -------------------------------------------------------------------------------------
+    # -- Closes the log
+    # -------------------------------------------------------------------------------------
+    def Close(self):
+        self.map.close()
+        self.file.close()
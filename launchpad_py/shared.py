@@ -0,0 +1,206 @@
+#
+# A frame buffer in shared memory, so several processes can draw on one Launchpad.
+#
+# The process that owns the Launchpad creates a SharedFrameServer. Worker processes
+# attach to its SharedFrame by name, write color codes (see LedGetColor()) into it
+# and call Commit(). The server polls the frame's generation counter and, if it
+# changed, copies the frame into the Launchpad's frame buffer and flushes it, so
+# only the LEDs that changed are sent. Nothing is pickled or sent between the
+# processes; the frame path is a plain memory write.
+#
+# The block (multiprocessing.shared_memory, Python 3.8+) is laid out as:
+#
+#   offset  size
+#        0     8  generation, incremented by Commit() (unsigned, native byte order)
+#        8    81  color codes, LedFrame order (cell y*9+x; cell 8 has no LED)
+#
+#   # owner
+#   server = SharedFrameServer( lp, fps = 60 )
+#   server.Start()
+#   Process( target = worker, args = ( server.name, server.lock ) ).start()
+#
+#   # worker
+#   frame = SharedFrame( name, lock = lock )
+#   frame.SetXY( 3, 4, 0x33 )
+#   frame.Commit()
+#
+# A frame may be flushed while a worker is still drawing; the rest of the drawing
+# follows with its Commit().
+#
+
+import threading
+
+from multiprocessing import shared_memory
+
+
+# generation counter, then the cells
+HEADER_SIZE = 8
+SIZE = HEADER_SIZE + 81
+
+
+########################################################################################
+# CLASS SharedFrame
+###
+# Creates a new block (<create>, <name> None for a random one) or attaches to the
+# block <name>. If several processes commit to the same frame, pass them all the
+# same multiprocessing.Lock as <lock>, otherwise a commit may go unnoticed.
+########################################################################################
+class SharedFrame(object):
+
+    def __init__(self, name=None, create=False, lock=None):
+        if create:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=SIZE)
+        else:
+            try:
+                # the creator cleans up; don't let this process' tracker unlink the block
+                self.shm = shared_memory.SharedMemory(name=name, track=False)
+            except TypeError:
+                # Python < 3.13
+                self.shm = shared_memory.SharedMemory(name=name)
+        self.owner = create
+        self.lock = lock
+        self.name = self.shm.name
+        self.generation = self.shm.buf[:HEADER_SIZE].cast("Q")
+        self.cells = self.shm.buf[HEADER_SIZE:SIZE]
+        if create:
+            self.generation[0] = 0
+            self.cells[:] = bytes(81)
+
+    # -------------------------------------------------------------------------------------
+    # -- Sets the color code of cell <x>/<y>; coordinates outside the grid are ignored.
+    # -------------------------------------------------------------------------------------
+    def SetXY(self, x, y, code):
+        if x < 0 or x > 8 or y < 0 or y > 8:
+            return
+        self.cells[y * 9 + x] = code
+
+    # -------------------------------------------------------------------------------------
+    # -- Returns the color code of cell <x>/<y>
+    # -------------------------------------------------------------------------------------
+    def GetXY(self, x, y):
+        return self.cells[y * 9 + x]
+
+    # -------------------------------------------------------------------------------------
+    # -- Sets all 81 cells from <codes> (bytes, list, LedFrame.cells, ...)
+    # -------------------------------------------------------------------------------------
+    def SetCells(self, codes):
+        self.cells[:] = bytes(codes)
+
+    # -------------------------------------------------------------------------------------
+    # -- Sets all cells to color code <code>
+    # -------------------------------------------------------------------------------------
+    def Clear(self, code=0):
+        self.cells[:] = bytes((code,)) * 81
+
+    # -------------------------------------------------------------------------------------
+    # -- Publishes the drawing; returns the new generation
+    # -------------------------------------------------------------------------------------
+    def Commit(self):
+        if self.lock is None:
+            gen = self.generation[0] = (self.generation[0] + 1) & 0xffffffffffffffff
+            return gen
+        with self.lock:
+            gen = self.generation[0] = (self.generation[0] + 1) & 0xffffffffffffffff
+            return gen
+
+    # -------------------------------------------------------------------------------------
+    # -- Returns the current generation
+    # -------------------------------------------------------------------------------------
+    def Generation(self):
+        return self.generation[0]
+
+    # -------------------------------------------------------------------------------------
+    # -- Detaches from the block; the creator also removes it
+    # -------------------------------------------------------------------------------------
+    def Close(self):
+        if self.shm is None:
+            return
+        self.generation.release()
+        self.cells.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+        self.shm = None
+
+
+########################################################################################
+# CLASS SharedFrameServer
+###
+# Owner side: creates a SharedFrame (<name> None for a random one, see <name>) and
+# flushes it to Launchpad <lp> whenever its generation changes, checking <fps>
+# times per second. <lock> is a multiprocessing.Lock for the workers.
+########################################################################################
+class SharedFrameServer(object):
+
+    def __init__(self, lp, name=None, fps=60, lock=None):
+        if lock is None:
+            import multiprocessing
+            lock = multiprocessing.Lock()
+        self.lp = lp
+        self.lock = lock
+        self.frame = SharedFrame(name, create=True, lock=lock)
+        self.name = self.frame.name
+        self.period = 1.0 / fps
+        self.lastGeneration = 0
+        self.thread = None
+        self.stop = threading.Event()
+
+        # statistics
+        self.flushes = 0
+        self.sent = 0
+
+    # -------------------------------------------------------------------------------------
+    # -- Flushes the frame if its generation changed; returns the number of MIDI
+    # -- messages sent. Called by the server's thread, but can also be used to drive
+    # -- the server from an own loop.
+    # -------------------------------------------------------------------------------------
+    def Poll(self):
+        frame = self.frame
+        gen = frame.generation[0]
+        if gen == self.lastGeneration:
+            return 0
+        self.lastGeneration = gen
+
+        lp = self.lp
+        with lp.frameLock:
+            with lp.drawLock:
+                lp.frame.cells[:] = frame.cells
+            sent = lp.Flush()
+        self.flushes += 1
+        self.sent += sent
+        return sent
+
+    # -------------------------------------------------------------------------------------
+    # -- Starts polling in a background thread
+    # -------------------------------------------------------------------------------------
+    def Start(self):
+        if self.thread is not None:
+            return
+        self.stop.clear()
+        self.thread = threading.Thread(target=self.Loop, name="LaunchpadSharedFrame")
+        self.thread.daemon = True
+        self.thread.start()
+
+    # -------------------------------------------------------------------------------------
+    # -- Stops polling; the last frame stays on the screen
+    # -------------------------------------------------------------------------------------
+    def Stop(self):
+        self.stop.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+        self.thread = None
+
+    # -------------------------------------------------------------------------------------
+    # -- Stops polling and removes the shared memory block
+    # -------------------------------------------------------------------------------------
+    def Close(self):
+        self.Stop()
+        self.frame.Close()
+
+    # -------------------------------------------------------------------------------------
+    # -- The polling thread
+    # -------------------------------------------------------------------------------------
+    def Loop(self):
+        while not self.stop.is_set():
+            self.Poll()
+            self.stop.wait(self.period)
@@ -0,0 +1,212 @@
+#
+# Optional instrumentation for class Midi; see Midi.StatsEnable().
+#
+# When enabled, the Midi object's ports are wrapped by StatsOutput and StatsInput,
+# which count messages and bytes, measure how long each call blocks and how old
+# input events are when they are read. When disabled, the ports are used directly,
+# so there's no cost at all.
+#
+
+import threading
+
+from time import perf_counter
+
+
+########################################################################################
+# CLASS Histogram
+###
+# Log2 histogram of durations; bucket <n> counts values of 2^n..2^(n+1)-1 microseconds
+# (bucket 0 also counts everything below 1us).
+########################################################################################
+class Histogram(object):
+
+    BUCKETS = 24
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.total = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    # -------------------------------------------------------------------------------------
+    # -- Adds a duration of <seconds>
+    # -------------------------------------------------------------------------------------
+    def Add(self, seconds):
+        us = int(seconds * 1000000)
+        self.counts[min(self.BUCKETS - 1, max(0, us.bit_length() - 1))] += 1
+        self.total += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    # -------------------------------------------------------------------------------------
+    # -- Returns the upper bound (s) of the bucket containing the <p> percentile
+    # -------------------------------------------------------------------------------------
+    def Percentile(self, p):
+        if self.total == 0:
+            return 0.0
+        limit = self.total * p / 100.0
+        n = 0
+        for i, count in enumerate(self.counts):
+            n += count
+            if n >= limit:
+                return (1 << (i + 1)) / 1000000.0
+        return self.max
+
+    # -------------------------------------------------------------------------------------
+    # -- Returns the histogram as a dictionary
+    # -------------------------------------------------------------------------------------
+    def Snapshot(self):
+        return {
+            "count": self.total,
+            "mean": self.sum / self.total if self.total else 0.0,
+            "max": self.max,
+            "p50": self.Percentile(50),
+            "p99": self.Percentile(99),
+            "buckets_us": dict(((1 << i), c) for i, c in enumerate(self.counts) if c),
+        }
+
+
+########################################################################################
+# CLASS MidiStats
+###
+# Counters, histograms and hooks of one Midi object
+########################################################################################
+class MidiStats(object):
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hooks = []
+        self.Reset()
+
+    # -------------------------------------------------------------------------------------
+    # -- Clears all counters
+    # -------------------------------------------------------------------------------------
+    def Reset(self):
+        self.msgsOut = 0
+        self.bytesOut = 0
+        self.writesOut = 0
+        self.msgsIn = 0
+        self.bytesIn = 0
+        self.readsIn = 0
+        self.peakInDepth = 0
+        self.writeTime = Histogram()
+        self.readTime = Histogram()
+        self.inputAge = Histogram()
+
+    # -------------------------------------------------------------------------------------
+    # -- Registers <hook>( kind, messages, bytes, seconds ), called for each write
+    # -- ("out") and each non-empty read ("in"); from the thread that did the I/O.
+    # -------------------------------------------------------------------------------------
+    def AddHook(self, hook):
+        self.hooks.append(hook)
+
+    # -------------------------------------------------------------------------------------
+    # -- Removes a hook registered with AddHook()
+    # -------------------------------------------------------------------------------------
+    def RemoveHook(self, hook):
+        if hook in self.hooks:
+            self.hooks.remove(hook)
+
+    # -------------------------------------------------------------------------------------
+    # -- Records a write of <msgs> messages and <nbytes> bytes that took <seconds>
+    # -------------------------------------------------------------------------------------
+    def Write(self, msgs, nbytes, seconds):
+        with self.lock:
+            self.msgsOut += msgs
+            self.bytesOut += nbytes
+            self.writesOut += 1
+            self.writeTime.Add(seconds)
+        for hook in self.hooks:
+            hook("out", msgs, nbytes, seconds)
+
+    # -------------------------------------------------------------------------------------
+    # -- Records a read of <events> (as returned by the port) that took <seconds>;
+    # -- <now> is the MIDI time. Input events are short messages, 3 bytes each.
+    # -------------------------------------------------------------------------------------
+    def Read(self, events, seconds, now):
+        n = len(events)
+        nbytes = 3 * n
+        with self.lock:
+            self.readsIn += 1
+            self.readTime.Add(seconds)
+            if n:
+                self.msgsIn += n
+                self.bytesIn += nbytes
+                # Midi.ReadRaw() reads everything waiting at once, so this is the backlog
+                if n > self.peakInDepth:
+                    self.peakInDepth = n
+                # how long the oldest event waited in the input buffer
+                self.inputAge.Add(max(0, now - events[0][1]) / 1000.0)
+        if n:
+            for hook in self.hooks:
+                hook("in", n, nbytes, seconds)
+
+    # -------------------------------------------------------------------------------------
+    # -- Returns all counters and histograms as a dictionary, e.g. for dashboards
+    # -------------------------------------------------------------------------------------
+    def Snapshot(self):
+        with self.lock:
+            return {
+                "msgs_out": self.msgsOut,
+                "bytes_out": self.bytesOut,
+                "writes_out": self.writesOut,
+                "msgs_in": self.msgsIn,
+                "bytes_in": self.bytesIn,
+                "reads_in": self.readsIn,
+                "peak_in_depth": self.peakInDepth,
+                "write_time": self.writeTime.Snapshot(),
+                "read_time": self.readTime.Snapshot(),
+                "input_age": self.inputAge.Snapshot(),
+            }
+
+
+########################################################################################
+# CLASS StatsOutput, StatsInput
+###
+# Port wrappers; <port> is the original port object
+########################################################################################
+class StatsOutput(object):
+
+    def __init__(self, port, stats):
+        self.port = port
+        self.stats = stats
+
+    def write_short(self, stat, dat1=0, dat2=0):
+        t = perf_counter()
+        self.port.write_short(stat, dat1, dat2)
+        self.stats.Write(1, 3, perf_counter() - t)
+
+    def write(self, lstMessages):
+        t = perf_counter()
+        self.port.write(lstMessages)
+        self.stats.Write(
+            len(lstMessages), sum(len(msg) for msg, timestamp in lstMessages), perf_counter() - t)
+
+    def write_sys_ex(self, timestamp, msg):
+        t = perf_counter()
+        self.port.write_sys_ex(timestamp, msg)
+        self.stats.Write(1, len(msg), perf_counter() - t)
+
+    def close(self):
+        self.port.close()
+
+
+class StatsInput(object):
+
+    def __init__(self, port, stats, clock):
+        self.port = port
+        self.stats = stats
+        self.clock = clock
+
+    def poll(self):
+        return self.port.poll()
+
+    def read(self, count):
+        t = perf_counter()
+        events = self.port.read(count)
+        self.stats.Read(events, perf_counter() - t, self.clock())
+        return events
+
+    def close(self):
+        self.port.close()
@@ -0,0 +1,345 @@
+#
+# A hardware-free MIDI backend with simulated Launchpads (Mk1 protocol).
+#
+# Each VirtualLaunchpad shows up as an input and an output port, keeps track of
+# its LEDs, can play back scripted button events and can model the limited
+# number of messages per second a real device is able to process.
+#
+#   vlp = VirtualLaunchpad()
+#   Midi.SetBackend( VirtualBackend( [ vlp ] ) )
+#   lp = Launchpad()
+#   lp.Open()
+#   vlp.Press( 3, 4 )
+#   lp.ButtonStateXY()     -> [ 3, 4, True ]
+#   vlp.GetXY( 3, 4 )      -> color code
+#
+
+import heapq
+import threading
+
+from time import sleep, monotonic
+
+try:
+    from launchpad_py.backend import MidiBackend
+except ImportError:
+    from backend import MidiBackend
+
+
+########################################################################################
+# CLASS VirtualLaunchpad
+###
+# LEDs are kept in a list of 81 color codes, laid out like class LedFrame (X/Y).
+# There are two of those buffers, as in the real device: <leds> is the one shown,
+# LED messages go to buffers[ <update> ].
+########################################################################################
+class VirtualLaunchpad(object):
+
+    # LedFrame cell for each LED position of a rapid update
+    RAPID_CELL = tuple(
+        [(y+1) * 9 + x for y in range(8) for x in range(8)] +
+        [(y+1) * 9 + 8 for y in range(8)] +
+        [x for x in range(8)])
+
+    # -------------------------------------------------------------------------------------
+    # -- <rateLimit> is the number of messages per second the device can process
+    # -- (None: unlimited), with bursts of up to <burst> messages. Messages beyond that
+    # -- are counted in <overruns> and, depending on <overflow>:
+    # --   "count": processed anyway
+    # --   "drop":  ignored, like a real device that gets confused
+    # --   "block": the sender waits until the device is ready again
+    # -------------------------------------------------------------------------------------
+    def __init__(self, name="Launchpad Virtual", rateLimit=None, burst=32, overflow="count"):
+        self.name = name
+        self.rateLimit = rateLimit
+        self.burst = burst
+        self.overflow = overflow
+        # MIDI time in ms; replaced by the backend's clock, see VirtualBackend
+        self.start = monotonic()
+        self.clock = self.GetTime
+
+        self.buffers = [[0] * 81, [0] * 81]
+        self.display = 0
+        self.update = 0
+        self.leds = self.buffers[0]
+        self.rapidPos = 0
+        self.sysex = []
+        self.messages = 0
+        self.overruns = 0
+        self.tokens = burst
+        self.tokenTime = None
+
+        # scripted input; heap of ( <time ms>, <sequence>, [ stat, dat1, dat2, 0 ] )
+        self.inputs = []
+        self.inputSeq = 0
+        self.lock = threading.Lock()
+
+    # -------------------------------------------------------------------------------------
+    # -- The clock of a device without a backend: integer ms since it was created
+    # -------------------------------------------------------------------------------------
+    def GetTime(self):
+        return int((monotonic() - self.start) * 1000)
+
+    # -------------------------------------------------------------------------------------
+    # -- Returns the color code of LED <x>/<y>, as shown (or in <buffer> 0 or 1)
+    # -------------------------------------------------------------------------------------
+    def GetXY(self, x, y, buffer=None):
+        leds = self.leds if buffer is None else self.buffers[buffer]
+        return leds[y * 9 + x]
+
+    # -------------------------------------------------------------------------------------
+    # -- Token bucket; returns False if the message should be dropped
+    # -------------------------------------------------------------------------------------
+    def RateCheck(self):
+        if self.rateLimit is None:
+            return True
+
+        now = monotonic()
+        if self.tokenTime is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self.tokenTime) * self.rateLimit)
+        self.tokenTime = now
+
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+
+        self.overruns += 1
+        if self.overflow == "block":
+            sleep((1 - self.tokens) / self.rateLimit)
+            self.tokenTime = monotonic()
+            self.tokens = 0
+            return True
+        return self.overflow != "drop"
+
+    # -------------------------------------------------------------------------------------
+    # -- Processes a short MIDI message, as the Launchpad Mk1 does.
+    # -------------------------------------------------------------------------------------
+    def Receive(self, stat, dat1, dat2):
+        with self.lock:
+            self.messages += 1
+            if not self.RateCheck():
+                return
+
+            if stat == 144 or stat == 128:
+                x = dat1 & 0x0f
+                y = dat1 >> 4
+                if x < 9 and y < 8:
+                    self.SetLed((y+1) * 9 + x, dat2 if stat == 144 else 0)
+            elif stat == 176:
+                if dat1 == 0:
+                    if dat2 == 0 or dat2 >= 125:
+                        # reset, or all LEDs on; also ends double buffering
+                        code = 0 if dat2 == 0 else 0x33
+                        for leds in self.buffers:
+                            leds[:] = [code] * 81
+                            leds[8] = 0
+                        self.SetBuffers(0, 0)
+                        self.rapidPos = 0
+                    elif 32 <= dat2 <= 61:
+                        # 0 0 1 <copy> <flash> <update> 0 <display>
+                        self.SetBuffers(dat2 & 1, (dat2 >> 2) & 1)
+                        if dat2 & 16:
+                            self.buffers[self.update][:] = self.leds
+                elif dat1 == 1:
+                    self.rapidPos = 0
+                elif 104 <= dat1 <= 111:
+                    self.SetLed(dat1 - 104, dat2)
+            elif stat == 146:
+                rapidCell = self.RAPID_CELL
+                self.SetLed(rapidCell[self.rapidPos], dat1)
+                self.SetLed(rapidCell[(self.rapidPos + 1) % 80], dat2)
+                self.rapidPos = (self.rapidPos + 2) % 80
+
+    # -------------------------------------------------------------------------------------
+    # -- Selects the shown and the written buffer
+    # -------------------------------------------------------------------------------------
+    def SetBuffers(self, display, update):
+        self.display = display
+        self.update = update
+        self.leds = self.buffers[display]
+
+    # -------------------------------------------------------------------------------------
+    # -- Writes LED <cell> of the update buffer, with the Mk1's <velocity> flags:
+    # -- bit 3 clears the LED in the other buffer, bit 2 writes it to both buffers.
+    # -------------------------------------------------------------------------------------
+    def SetLed(self, cell, velocity):
+        code = velocity & 0x33
+        other = self.buffers[1 - self.update]
+        if velocity & 8:
+            other[cell] = 0
+        if velocity & 4:
+            other[cell] = code
+        self.buffers[self.update][cell] = code
+
+    # -------------------------------------------------------------------------------------
+    # -- Stores a system exclusive message
+    # -------------------------------------------------------------------------------------
+    def ReceiveSysEx(self, msg):
+        with self.lock:
+            self.messages += 1
+            self.sysex.append(bytes(msg))
+
+    # -------------------------------------------------------------------------------------
+    # -- Queues a button event for <x>/<y> (X/Y layout of class Launchpad), at MIDI
+    # -- time <at> in ms (None: now).
+    # -------------------------------------------------------------------------------------
+    def Press(self, x, y, pressed=True, at=None):
+        if y == 0:
+            data = [176, 104 + x, 127 if pressed else 0, 0]
+        else:
+            data = [144, ((y-1) << 4) | x, 127 if pressed else 0, 0]
+        self.Inject(data, at)
+
+    # -------------------------------------------------------------------------------------
+    # -- Queues a press and, <holdMs> later, a release of button <x>/<y>
+    # -------------------------------------------------------------------------------------
+    def Tap(self, x, y, holdMs=50, at=None):
+        at = self.clock() if at is None else at
+        self.Press(x, y, True, at)
+        self.Press(x, y, False, at + holdMs)
+
+    # -------------------------------------------------------------------------------------
+    # -- Queues a list of scripted button events [ ( <time ms>, <x>, <y>, <pressed> ), ... ];
+    # -- times are relative to now.
+    # -------------------------------------------------------------------------------------
+    def Script(self, events):
+        now = self.clock()
+        for ms, x, y, pressed in events:
+            self.Press(x, y, pressed, now + ms)
+
+    # -------------------------------------------------------------------------------------
+    # -- Queues any raw MIDI message <data> ([stat, dat1, dat2, dat3]) at time <at>
+    # -------------------------------------------------------------------------------------
+    def Inject(self, data, at=None):
+        at = self.clock() if at is None else at
+        with self.lock:
+            heapq.heappush(self.inputs, (at, self.inputSeq, list(data)))
+            self.inputSeq += 1
+
+    # -------------------------------------------------------------------------------------
+    # -- True if an input event is due
+    # -------------------------------------------------------------------------------------
+    def InputPending(self):
+        inputs = self.inputs
+        return len(inputs) > 0 and inputs[0][0] <= self.clock()
+
+    # -------------------------------------------------------------------------------------
+    # -- Returns up to <count> due input events, in PyGame's format.
+    # -- Like PortMidi, if more than <bufferSize> events are due, the newest ones are lost
+    # -- and the read fails with a "buffer overflow" error (the next one succeeds again).
+    # -------------------------------------------------------------------------------------
+    def InputRead(self, count, bufferSize=None):
+        ret = []
+        now = self.clock()
+        with self.lock:
+            inputs = self.inputs
+            if bufferSize is not None and len(inputs) > bufferSize:
+                due = sorted(inputs)
+                n = sum(1 for ev in due if ev[0] <= now)
+                if n > bufferSize:
+                    self.inputs = due[:bufferSize] + due[n:]
+                    heapq.heapify(self.inputs)
+                    raise IOError("virtual input buffer overflow")
+            while inputs and len(ret) < count and inputs[0][0] <= now:
+                at, seq, data = heapq.heappop(inputs)
+                ret.append([data, at])
+        return ret
+
+
+########################################################################################
+# CLASS VirtualOutput, VirtualInput
+###
+# Port objects, PyGame style
+########################################################################################
+class VirtualOutput(object):
+
+    def __init__(self, device):
+        self.device = device
+
+    def write_short(self, stat, dat1=0, dat2=0):
+        self.device.Receive(stat, dat1, dat2)
+
+    def write(self, lstMessages):
+        receive = self.device.Receive
+        for msg, timestamp in lstMessages:
+            receive(msg[0], msg[1] if len(msg) > 1 else 0, msg[2] if len(msg) > 2 else 0)
+
+    def write_sys_ex(self, timestamp, msg):
+        self.device.ReceiveSysEx(msg)
+
+    def close(self):
+        pass
+
+
+class VirtualInput(object):
+
+    def __init__(self, device, bufferSize=None):
+        self.device = device
+        self.bufferSize = bufferSize
+
+    def poll(self):
+        return self.device.InputPending()
+
+    def read(self, count):
+        return self.device.InputRead(count, self.bufferSize)
+
+    def close(self):
+        pass
+
+
+########################################################################################
+# CLASS VirtualBackend
+###
+# Device <n> has its input at MIDI id 2*n and its output at 2*n+1.
+# With <realtime> False, the MIDI clock only advances via Wait() or Advance(),
+# which makes scripted input deterministic.
+########################################################################################
+class VirtualBackend(MidiBackend):
+
+    def __init__(self, devices=None, realtime=True):
+        self.devices = [VirtualLaunchpad()] if devices is None else list(devices)
+        self.realtime = realtime
+        self.start = monotonic()
+        self.now = 0
+        for dev in self.devices:
+            dev.clock = self.GetTime
+
+    def Init(self):
+        pass
+
+    def Quit(self):
+        pass
+
+    def GetCount(self):
+        return 2 * len(self.devices)
+
+    def GetDeviceInfo(self, midi_id):
+        dev = self.devices[midi_id // 2]
+        isInput = 1 if midi_id % 2 == 0 else 0
+        return (b"virtual", dev.name.encode(), isInput, 1 - isInput, 0)
+
+    def GetTime(self):
+        if self.realtime:
+            return int((monotonic() - self.start) * 1000)
+        return self.now
+
+    # -------------------------------------------------------------------------------------
+    # -- Advances the MIDI clock by <ms>; only if not <realtime>
+    # -------------------------------------------------------------------------------------
+    def Advance(self, ms):
+        self.now += ms
+
+    def Wait(self, ms):
+        if self.realtime:
+            sleep(ms / 1000.0)
+        else:
+            self.Advance(ms)
+
+    def OpenOutput(self, midi_id, latency=0, bufferSize=None):
+        if midi_id % 2 != 1 or midi_id // 2 >= len(self.devices):
+            raise ValueError("no virtual output %d" % midi_id)
+        return VirtualOutput(self.devices[midi_id // 2])
+
+    def OpenInput(self, midi_id, bufferSize=None):
+        if midi_id % 2 != 0 or midi_id // 2 >= len(self.devices):
+            raise ValueError("no virtual input %d" % midi_id)
+        return VirtualInput(self.devices[midi_id // 2], bufferSize)
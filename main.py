@@ -1,27 +1,32 @@
 from time import sleep
 from launchpad_mini import LaunchpadMini
+from launchpad_py.effects import EffectsEngine, Sprite
 
 lp = LaunchpadMini()
 lp.setup()
+# draw into the hidden buffer, show complete frames only
+lp.FrameDoubleBuffer()
 
-buttonPressed = 0
-offset = 0
-while True:
-    lp.Reset()
-    buttonPressed = lp.ButtonStateRaw()
-    for x in range(3):
-        for y in range(3):
-            lp.LedCtrlXY(x + offset, y + offset, x, y)
-    if buttonPressed:
-        if buttonPressed[0] == 0 and buttonPressed[1]:
-            # Green, Yellow, Orange, Red
-            print(buttonPressed)
-            pass
-    offset += 1
-    offset %= 8
-    sleep(0.05)
+# a 3x3 block, red increasing to the right, green downwards, moving diagonally
+fx = EffectsEngine(lp, fps=20)
+fx.Add(Sprite([(x, y, x, y) for x in range(3) for y in range(3)], dx=20, dy=20, wrap=(8, 8)))
+fx.Start()
 
+buttonPressed = 0
+try:
+    while True:
+        buttonPressed = lp.ButtonStateRaw()
+        if buttonPressed:
+            if buttonPressed[0] == 0 and buttonPressed[1]:
+                # Green, Yellow, Orange, Red
+                print(buttonPressed)
+                pass
+        sleep(0.01)
+except KeyboardInterrupt:
+    pass
 
+fx.Stop()
+print(fx.Stats())
 lp.Reset()
 lp.Close()
 print(lp)
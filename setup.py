@@ -14,4 +14,7 @@ setup(
 	keywords = "novation launchpad midi",
 	url = "https://github.com/FMMT666/launchpad.py",
 	packages = ["launchpad_py"],
+	extras_require = {
+		"numpy": ["numpy"],
+	},
 )